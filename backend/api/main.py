@@ -1,22 +1,41 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, FileResponse
+from fastapi.responses import Response, FileResponse, StreamingResponse, JSONResponse, RedirectResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, text
+from sqlalchemy import text, func, select, update
 from sqlalchemy.orm import sessionmaker, Session
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 import yt_dlp
 import requests
 import os
 import glob
 import json
+from urllib.parse import quote
+import threading
+import asyncio
 
-from backend.models import Base, Channel, Video, History, Playlist
+from backend.models import Base, Channel, Video, History, Playlist, PlaylistStats, PlaylistVideo, ChannelStats, EpisodeSequence
+from backend.services.database import create_sqlite_engine, WriteQueue
 from backend.services.downloader import Downloader
 from backend.services.monitor import Monitor
+from backend.services.download_queue import DownloadWorkerPool
+from backend.services.ingest import VideoIngestor
+from backend.services.scheduler import SyncScheduler
+from backend.services.metadata_cache import MetadataCache
+from backend.services.library_stats import LibraryStats
+from backend.services.pagination import Keyset, InvalidCursor
+from backend.services.activity import ActivityView
+from backend.services.episodes import EpisodeAllocator
+from backend.services.jobs import JobManager
+from backend.services.singleflight import SingleFlight
+from backend.services.image_cache import ImageCache
+from backend.services.artwork import LocalArtwork
+from backend.services.ydl_pool import ydl_pool
 from backend.services.websocket_manager import ws_manager
 
 app = FastAPI(title="Tubarr", version="1.0.2")
@@ -37,9 +56,31 @@ STATIC_DIR = os.getenv('STATIC_DIR', '/app/frontend/build')
 if os.path.exists(os.path.join(STATIC_DIR, 'static')):
     app.mount("/static", StaticFiles(directory=os.path.join(STATIC_DIR, 'static')), name="static")
 
-engine = create_engine(f'sqlite:///{CONFIG_PATH}/tubarr.db')
+# WAL journaling unless overridden (e.g. TUBARR_DB_JOURNAL_MODE=DELETE for network filesystems)
+engine = create_sqlite_engine(f'{CONFIG_PATH}/tubarr.db', journal_mode=os.getenv('TUBARR_DB_JOURNAL_MODE', 'WAL'))
 Base.metadata.create_all(engine)
 SessionLocal = sessionmaker(bind=engine)
+LibraryStats.install(SessionLocal)
+
+# Serialized writer for small high-frequency updates (progress, access stamps)
+write_queue = WriteQueue(engine)
+write_queue.start()
+
+# Cached yt-dlp metadata lookups for UI browsing (search, previews, channel info)
+metadata_cache = MetadataCache(SessionLocal, write_queue=write_queue)
+
+# Proxied thumbnails kept on disk; new uploads get their grid thumbnail prefetched
+image_cache = ImageCache(
+    SessionLocal,
+    os.path.join(CONFIG_PATH, 'images'),
+    max_bytes=int(os.getenv('TUBARR_IMAGE_CACHE_MB', 512)) * 1024 * 1024,
+    write_queue=write_queue
+)
+THUMBNAIL_PREFETCH_LIMIT = 100
+
+# Artwork written next to downloaded episodes, with downscaled copies for the grid
+local_artwork = LocalArtwork(os.path.join(CONFIG_PATH, 'artwork'))
+ARTWORK_GRID_WIDTH = 320
 
 def get_db():
     db = SessionLocal()
@@ -60,19 +101,32 @@ def get_next_season_number(db: Session, channel_id: int):
     
     return 1  # Fallback
 
-def background_download(video_id: str, channel_id: int):
+def set_download_status(video_pk: int, status: str):
+    """
+    Batched status flip for in-progress states. 'failed' and 'completed' feed the
+    library counters, which are kept by the ORM flush hook, so those stay
+    synchronous ORM writes (after a write_queue.flush()).
+    """
+    write_queue.submit(update(Video).where(Video.id == video_pk).values(download_status=status))
+
+def background_download(video_id: str, channel_id: int, progress_hook=None):
+    """Download a video's media; returns a callable that post-processes the file and marks the video downloaded"""
     db = SessionLocal()
+    video = None
+    # Unprocessed extraction reused by the download, so the video page is fetched once
+    info = None
     try:
         video = db.query(Video).filter_by(video_id=video_id, channel_id=channel_id).first()
         if not video:
             ydl_opts = {'quiet': True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+            with ydl_pool.checkout(ydl_opts) as ydl:
+                info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False, process=False)
                 video = Video(
                     video_id=video_id,
                     channel_id=channel_id,
                     title=info.get('title', 'Unknown'),
                     publish_date=datetime.now(),
+                    uploaded_at=Monitor.upload_time(info),
                     download_status='downloading',
                     season_number=0  # Default to Season 00 for individual videos
                 )
@@ -82,68 +136,115 @@ def background_download(video_id: str, channel_id: int):
             # Update title if it's still the placeholder
             if video.title == "Fetching info...":
                 ydl_opts = {'quiet': True}
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+                with ydl_pool.checkout(ydl_opts) as ydl:
+                    info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False, process=False)
                     video.title = info.get('title', 'Unknown')
-            video.download_status = 'downloading'
-            db.commit()
+                db.commit()
+            set_download_status(video.id, 'downloading')
         
-        # Check if video belongs to any monitored playlists
-        monitored_playlists = db.query(Playlist).filter_by(channel_id=channel_id, monitored=True).all()
-        assigned_to_playlist = False
+        channel = db.query(Channel).filter_by(id=channel_id).first()
+        settings = get_settings()
+        download_path = channel.download_path or settings.get('defaultPath', '/downloads')
+        quality = channel.quality
         playlist_title = None
         
-        for playlist in monitored_playlists:
-            # Check if video is in this playlist
+        # Videos queued from a playlist download already carry their season/episode
+        playlist = db.query(Playlist).filter_by(playlist_id=video.playlist_id).first() if video.playlist_id else None
+        if playlist:
+            playlist_title = playlist.title
+            download_path = playlist.download_path or download_path
+            quality = playlist.quality or quality
+        else:
+            # Look the video up in the stored membership of monitored playlists
             monitor = Monitor(db)
-            playlist_videos = monitor.get_playlist_videos(f'https://www.youtube.com/playlist?list={playlist.playlist_id}')
-            video_ids_in_playlist = [v['video_id'] for v in playlist_videos]
-            
-            if video_id in video_ids_in_playlist:
-                # Find episode number in playlist
-                episode_num = next((i+1 for i, v in enumerate(playlist_videos) if v['video_id'] == video_id), 1)
+            match = monitor.find_playlist_for_video(channel_id, video_id)
+            # Playlists monitored before membership was stored have no rows until refreshed
+            if not match and monitor.backfill_playlist_membership(channel_id):
+                match = monitor.find_playlist_for_video(channel_id, video_id)
+            if match:
+                playlist, position = match
                 video.season_number = playlist.season_number
-                video.episode_number = episode_num
+                video.episode_number = position
                 video.playlist_id = playlist.playlist_id
                 playlist_title = playlist.title
-                assigned_to_playlist = True
+                download_path = playlist.download_path or download_path
+                quality = playlist.quality or quality
+                db.commit()
+            # If not in any playlist, assign to Season 00 with sequential episode number
+            elif not video.episode_number:
+                video.season_number = 0
+                video.episode_number = EpisodeAllocator.allocate(db, channel_id, 0)
                 db.commit()
-                break
-        
-        # If not in any playlist, assign to Season 00 with sequential episode number
-        if not assigned_to_playlist and not video.episode_number:
-            video.season_number = 0
-            video.episode_number = db.query(Video).filter_by(channel_id=channel_id, season_number=0).count()
-            db.commit()
         
-        channel = db.query(Channel).filter_by(id=channel_id).first()
-        settings = get_settings()
         downloader = Downloader()
         
-        path = downloader.download_video(
+        download = downloader.download_media(
             video_id,
             channel.channel_name,
-            channel.download_path or settings.get('defaultPath', '/downloads'),
-            channel.quality,
+            download_path,
+            quality,
             video.season_number,
             video.episode_number,
             settings.get('namingFormat', 'standard'),
             settings.get('customNaming'),
             playlist_title,  # Pass playlist title as season name
-            channel.thumbnail  # Pass channel thumbnail
+            channel.thumbnail,  # Pass channel thumbnail
+            progress_hook,
+            info
         )
         
-        video.downloaded = True
-        video.download_path = path
-        video.download_status = 'completed'
-        db.commit()
+        video_pk = video.id
+        set_download_status(video_pk, 'processing')
     except Exception as e:
         if video:
+            # Land any queued status flip first so it cannot overwrite 'failed'
+            write_queue.flush()
             video.download_status = 'failed'
             db.commit()
         print(f"Download failed: {e}")
+        raise
     finally:
         db.close()
+    
+    return lambda: finish_download(video_pk, downloader, download)
+
+def finish_download(video_pk: int, downloader: Downloader, download: dict):
+    """Post-processing stage of background_download, run on the download pool's post-processing workers"""
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter_by(id=video_pk).first()
+        if not video:
+            raise ValueError(f"Video {video_pk} no longer exists")
+        try:
+            path = downloader.postprocess(download)
+        except Exception as e:
+            write_queue.flush()
+            video.download_status = 'failed'
+            db.commit()
+            print(f"Post-processing failed: {e}")
+            raise
+        
+        write_queue.flush()
+        video.downloaded = True
+        video.download_path = path
+        video.download_status = 'completed'
+        if os.path.exists(path):
+            video.file_size = os.path.getsize(path)
+        db.commit()
+    finally:
+        db.close()
+
+def run_queued_download(video_pk: int, progress_hook):
+    """Download worker handler: download a queue row's video and hand back its post-processing stage"""
+    db = SessionLocal()
+    try:
+        video = db.query(Video).filter_by(id=video_pk).first()
+        if not video:
+            raise ValueError(f"Video {video_pk} no longer exists")
+        video_id, channel_id = video.video_id, video.channel_id
+    finally:
+        db.close()
+    return background_download(video_id, channel_id, progress_hook)
 
 # Pydantic models
 class ChannelCreate(BaseModel):
@@ -186,96 +287,126 @@ class SearchResult(BaseModel):
 # API Routes
 @app.get("/api/v1/search")
 def search_channels(query: str):
+    return job_accepted(job_manager.submit('search', run_search, query, params={'query': query}))
+
+def run_search(job, query: str):
     ydl_opts = {'quiet': True, 'extract_flat': True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        # Search for channels directly
-        results = ydl.extract_info(f'ytsearch20:channel {query}', download=False)
-        channels = []
-        seen = set()
-        
-        if 'entries' in results:
-            for entry in results['entries']:
-                if not entry:
-                    continue
-                channel_id = entry.get('channel_id')
-                if channel_id and channel_id not in seen:
-                    seen.add(channel_id)
-                    channels.append({
-                        'channel_id': channel_id,
-                        'channel_name': entry.get('channel'),
-                        'channel_url': entry.get('channel_url'),
-                        'subscriber_count': entry.get('channel_follower_count'),
-                        'thumbnail': None
-                    })
-        
-        return channels[:15]
+    # Search for channels directly
+    results = metadata_cache.extract(f'ytsearch20:channel {query}', ydl_opts, 'search')
+    channels = []
+    seen = set()
+    
+    if 'entries' in results:
+        for entry in results['entries']:
+            if not entry:
+                continue
+            channel_id = entry.get('channel_id')
+            if channel_id and channel_id not in seen:
+                seen.add(channel_id)
+                channels.append({
+                    'channel_id': channel_id,
+                    'channel_name': entry.get('channel'),
+                    'channel_url': entry.get('channel_url'),
+                    'subscriber_count': entry.get('channel_follower_count'),
+                    'thumbnail': None
+                })
+    
+    return channels[:15]
 
 @app.get("/api/v1/channel/info/{channel_id}")
 def get_channel_info(channel_id: str):
     ydl_opts = {'quiet': True, 'extract_flat': True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    try:
+        # Get channel page
+        info = metadata_cache.extract(f'https://www.youtube.com/channel/{channel_id}', ydl_opts, 'channel')
+        
+        # Get videos tab to count videos
+        video_count = None
         try:
-            # Get channel page
-            info = ydl.extract_info(f'https://www.youtube.com/channel/{channel_id}', download=False)
-            
-            # Get videos tab to count videos
-            video_count = None
-            try:
-                videos_info = ydl.extract_info(f'https://www.youtube.com/channel/{channel_id}/videos', download=False)
-                if videos_info:
-                    video_count = videos_info.get('playlist_count') or len(videos_info.get('entries', []))
-            except:
-                pass
-            
-            if info:
-                return {
-                    "thumbnail": info.get('thumbnails', [{}])[-1].get('url') if info.get('thumbnails') else None,
-                    "subscriber_count": info.get('channel_follower_count'),
-                    "video_count": video_count,
-                    "description": info.get('description', '')
-                }
+            videos_info = metadata_cache.extract(f'https://www.youtube.com/channel/{channel_id}/videos', ydl_opts, 'channel_videos')
+            if videos_info:
+                video_count = videos_info.get('playlist_count') or len(videos_info.get('entries', []))
         except:
             pass
+        
+        if info:
+            return {
+                "thumbnail": info.get('thumbnails', [{}])[-1].get('url') if info.get('thumbnails') else None,
+                "subscriber_count": info.get('channel_follower_count'),
+                "video_count": video_count,
+                "description": info.get('description', '')
+            }
+    except:
+        pass
     return {}
 
+# How long browsers may reuse a proxied image before asking again
+IMAGE_BROWSER_MAX_AGE = 24 * 60 * 60
+
+def youtube_thumbnail(video_id: str, size: str = 'mqdefault'):
+    return f"https://i.ytimg.com/vi/{video_id}/{size}.jpg"
+
+def proxied_thumbnail(video_id: str):
+    return f"/api/v1/proxy/image?url={quote(youtube_thumbnail(video_id), safe='')}"
+
+def video_thumbnail(video: Video):
+    """Grid thumbnail for a video: the local sidecar once downloaded, else the cached YouTube image"""
+    if video.downloaded and video.download_path:
+        return f"/api/v1/video/{video.video_id}/artwork?width={ARTWORK_GRID_WIDTH}"
+    return proxied_thumbnail(video.video_id)
+
+def prefetch_thumbnails(video_ids):
+    image_cache.prefetch(youtube_thumbnail(video_id) for video_id in list(video_ids)[:THUMBNAIL_PREFETCH_LIMIT])
+
 @app.get("/api/v1/proxy/image")
-def proxy_image(url: str):
-    try:
-        response = requests.get(url, timeout=5)
-        return Response(content=response.content, media_type=response.headers.get('content-type', 'image/jpeg'))
-    except:
+async def proxy_image(url: str, request: Request):
+    # A miss or revalidation waits on upstream, so it runs off the event loop
+    for attempt in range(2):
+        try:
+            entry = await run_in_threadpool(image_cache.fetch, url)
+        except requests.RequestException:
+            entry = None
+        # Eviction can remove the body between lookup and response; the retry refetches it
+        if not entry or os.path.exists(image_cache.path_for(entry)):
+            break
+    if not entry or not os.path.exists(image_cache.path_for(entry)):
         raise HTTPException(404, "Image not found")
+    
+    etag = f'"{entry.content_hash}"'
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={IMAGE_BROWSER_MAX_AGE}'}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(image_cache.path_for(entry), media_type=entry.content_type, headers=headers)
 
 @app.get("/api/v1/preview/channel/{channel_id}")
 def preview_channel(channel_id: str):
     ydl_opts = {'quiet': True, 'extract_flat': True, 'playlistend': 12}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(f'https://www.youtube.com/channel/{channel_id}/videos', download=False)
-        
-        videos = []
-        if 'entries' in info:
-            for entry in info['entries']:
-                if entry:
-                    videos.append({
-                        'video_id': entry.get('id'),
-                        'title': entry.get('title'),
-                        'thumbnail': f"https://i.ytimg.com/vi/{entry.get('id')}/mqdefault.jpg"
-                    })
-        
-        return {
-            'channel_id': channel_id,
-            'channel_name': info.get('channel', info.get('uploader', 'Unknown')),
-            'videos': videos
-        }
+    info = metadata_cache.extract(f'https://www.youtube.com/channel/{channel_id}/videos', ydl_opts, 'preview')
+    
+    videos = []
+    if 'entries' in info:
+        for entry in info['entries']:
+            if entry:
+                videos.append({
+                    'video_id': entry.get('id'),
+                    'title': entry.get('title'),
+                    'thumbnail': proxied_thumbnail(entry.get('id'))
+                })
+    
+    return {
+        'channel_id': channel_id,
+        'channel_name': info.get('channel', info.get('uploader', 'Unknown')),
+        'videos': videos
+    }
 
 @app.get("/api/v1/channel")
 def get_channels(db: Session = Depends(get_db)):
-    channels = db.query(Channel).all()
+    rows = db.query(Channel, ChannelStats).outerjoin(ChannelStats, ChannelStats.channel_id == Channel.id).all()
     result = []
-    for ch in channels:
+    for ch, stats in rows:
         # Only count videos discovered through monitoring (have duration metadata)
-        video_count = db.query(Video).filter_by(channel_id=ch.id).filter(Video.duration.isnot(None)).count()
-        downloaded_count = db.query(Video).filter_by(channel_id=ch.id, downloaded=True).count()
+        video_count = stats.discovered if stats else 0
+        downloaded_count = stats.downloaded if stats else 0
         
         ch_dict = {
             'id': ch.id,
@@ -293,7 +424,7 @@ def get_channels(db: Session = Depends(get_db)):
     return result
 
 @app.get("/api/v1/channel/{channel_id}")
-def get_channel_detail(channel_id: int, limit: int = 25, offset: int = 0, sort: str = 'date_desc', filter: str = 'all', db: Session = Depends(get_db)):
+def get_channel_detail(channel_id: int, limit: int = 25, offset: int = 0, sort: str = 'date_desc', filter: str = 'all', cursor: Optional[str] = None, db: Session = Depends(get_db)):
     channel = db.query(Channel).filter_by(id=channel_id).first()
     if not channel:
         raise HTTPException(404, "Channel not found")
@@ -307,19 +438,37 @@ def get_channel_detail(channel_id: int, limit: int = 25, offset: int = 0, sort:
     elif filter == 'available':
         query = query.filter_by(downloaded=False)
     
-    # Apply sorting
-    if sort == 'date_desc':
-        query = query.order_by(Video.publish_date.desc())
-    elif sort == 'date_asc':
-        query = query.order_by(Video.publish_date.asc())
-    elif sort == 'title':
-        query = query.order_by(Video.title)
+    # Apply sorting - id breaks ties so the keyset order is total
+    if sort == 'title':
+        keyset = Keyset(Video.title, Video.id)
+    else:
+        keyset = Keyset(Video.publish_date, Video.id, descending=(sort != 'date_asc'))
+    query = query.order_by(*keyset.order_by())
+    
+    # Totals come from the maintained counters instead of a COUNT per page
+    stats = LibraryStats.get(db, channel_id)
+    if filter == 'downloaded':
+        total_count = stats['discovered_downloaded']
+    elif filter == 'available':
+        total_count = stats['discovered'] - stats['discovered_downloaded']
+    else:
+        total_count = stats['discovered']
     
-    # Get total count
-    total_count = query.count()
+    # Apply pagination: continue after the cursor, or fall back to offset for old clients
+    scope = f"{sort}:{filter}"
+    if cursor:
+        try:
+            key, last_id = Keyset.decode(cursor, scope)
+        except InvalidCursor as e:
+            raise HTTPException(400, str(e))
+        query = query.filter(keyset.after(key, last_id))
+    elif offset:
+        query = query.offset(offset)
     
-    # Apply pagination
-    db_videos = query.limit(limit).offset(offset).all()
+    # One extra row tells whether another page exists
+    db_videos = query.limit(limit + 1).all()
+    has_more = len(db_videos) > limit
+    db_videos = db_videos[:limit]
     
     videos = []
     for v in db_videos:
@@ -327,64 +476,127 @@ def get_channel_detail(channel_id: int, limit: int = 25, offset: int = 0, sort:
             'video_id': v.video_id,
             'title': v.title,
             'downloaded': bool(v.downloaded),
-            'thumbnail': f"https://i.ytimg.com/vi/{v.video_id}/mqdefault.jpg",
+            'thumbnail': video_thumbnail(v),
             'duration': v.duration,
             'view_count': None
         })
     
-    downloaded_count = db.query(Video).filter_by(channel_id=channel_id, downloaded=True).count()
+    next_cursor = None
+    if has_more:
+        last = db_videos[-1]
+        next_cursor = Keyset.encode(scope, last.title if sort == 'title' else last.publish_date, last.id)
     
     return {
         "channel": channel,
         "videos": videos,
         "total_videos": total_count,
         "loaded_videos": len(videos),
-        "downloaded_count": downloaded_count,
-        "has_more": (offset + len(videos)) < total_count
+        "downloaded_count": stats['downloaded'],
+        "has_more": has_more,
+        "next_cursor": next_cursor
     }
 
+# Stored playlist stats older than this are served but refreshed in the background
+PLAYLIST_STATS_TTL = timedelta(hours=6)
+# A request arriving while its channel is being refreshed waits for that refresh
+playlist_refreshes = SingleFlight()
+
 @app.get("/api/v1/channel/{channel_id}/playlists")
 def get_channel_playlists(channel_id: int, db: Session = Depends(get_db)):
     channel = db.query(Channel).filter_by(id=channel_id).first()
     if not channel:
         raise HTTPException(404, "Channel not found")
     
-    ydl_opts = {'quiet': True, 'extract_flat': True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(f'https://www.youtube.com/channel/{channel.channel_id}/playlists', download=False)
-        
-        playlists = []
-        if 'entries' in info:
-            for entry in info['entries']:
-                if entry:
-                    count = 0
-                    downloaded_count = 0
-                    try:
-                        pl_info = ydl.extract_info(f'https://www.youtube.com/playlist?list={entry.get("id")}', download=False)
-                        count = pl_info.get('playlist_count', len(pl_info.get('entries', [])))
-                        
-                        # Get actual video IDs from playlist and check if downloaded
-                        if pl_info.get('entries'):
-                            video_ids = [v.get('id') for v in pl_info['entries'] if v and v.get('id')]
-                            downloaded_count = db.query(Video).filter(
-                                Video.video_id.in_(video_ids),
-                                Video.downloaded == True
-                            ).count()
-                    except:
-                        pass
-                    
-                    # Check if monitored
-                    pl_db = db.query(Playlist).filter_by(playlist_id=entry.get('id')).first()
-                    monitored = pl_db.monitored if pl_db else False
-                    
-                    playlists.append({
-                        'playlist_id': entry.get('id'),
-                        'title': entry.get('title'),
-                        'video_count': count,
-                        'monitored': monitored,
-                        'downloaded_count': downloaded_count
-                    })
-        return playlists
+    if not channel.playlists_refreshed_at:
+        # Nothing stored yet, so there is nothing to serve while revalidating
+        return job_accepted(job_manager.submit('playlists', run_playlist_refresh, channel_id, params={'channel_id': channel_id}))
+    if channel.playlists_refreshed_at < datetime.utcnow() - PLAYLIST_STATS_TTL:
+        # The stored stats are served while the refresh job runs
+        job_manager.submit('playlists_refresh', run_playlist_revalidate, channel_id, params={'channel_id': channel_id})
+    stats = db.query(PlaylistStats).filter_by(channel_id=channel_id).order_by(PlaylistStats.position).all()
+    return list_playlist_stats(db, stats)
+
+def run_playlist_refresh(job, channel_id: int):
+    refresh_playlist_stats(channel_id)
+    db = SessionLocal()
+    try:
+        stats = db.query(PlaylistStats).filter_by(channel_id=channel_id).order_by(PlaylistStats.position).all()
+        return list_playlist_stats(db, stats)
+    finally:
+        db.close()
+
+def list_playlist_stats(db: Session, stats: List[PlaylistStats]):
+    # Downloaded counts come from stored membership, so they are always current
+    playlist_ids = [stat.playlist_id for stat in stats]
+    downloaded = dict(db.query(PlaylistVideo.playlist_id, func.count(Video.id)).join(
+        Video, Video.video_id == PlaylistVideo.video_id
+    ).filter(
+        PlaylistVideo.playlist_id.in_(playlist_ids),
+        Video.downloaded == True
+    ).group_by(PlaylistVideo.playlist_id).all())
+    monitored = {p.playlist_id for p in db.query(Playlist).filter(Playlist.playlist_id.in_(playlist_ids), Playlist.monitored == True)}
+    
+    return [{
+        'playlist_id': stat.playlist_id,
+        'title': stat.title,
+        'video_count': stat.video_count,
+        'monitored': stat.playlist_id in monitored,
+        'downloaded_count': downloaded.get(stat.playlist_id, 0)
+    } for stat in stats]
+
+def run_playlist_revalidate(job, channel_id: int):
+    refresh_playlist_stats(channel_id)
+
+def refresh_playlist_stats(channel_id: int):
+    """Re-read a channel's playlists from YouTube and store their counts and membership; raises on failure"""
+    playlist_refreshes.do(channel_id, lambda: store_playlist_stats(channel_id))
+
+def store_playlist_stats(channel_id: int):
+    db = SessionLocal()
+    try:
+        channel = db.query(Channel).filter_by(id=channel_id).first()
+        if not channel:
+            raise ValueError(f"Channel {channel_id} no longer exists")
+        
+        ydl_opts = {'quiet': True, 'extract_flat': True}
+        info = metadata_cache.extract(f'https://www.youtube.com/channel/{channel.channel_id}/playlists', ydl_opts, 'playlists')
+        monitor = Monitor(db)
+        existing = {s.playlist_id: s for s in db.query(PlaylistStats).filter_by(channel_id=channel_id)}
+        now = datetime.utcnow()
+        
+        seen = set()
+        for position, entry in enumerate([e for e in info.get('entries') or [] if e], 1):
+            playlist_id = entry.get('id')
+            count = 0
+            try:
+                pl_info = metadata_cache.extract(f'https://www.youtube.com/playlist?list={playlist_id}', ydl_opts, 'playlist')
+                count = pl_info.get('playlist_count', len(pl_info.get('entries', [])))
+                monitor.update_playlist_membership(playlist_id, [
+                    {'video_id': v.get('id') if v else None} for v in pl_info.get('entries') or []
+                ])
+            except Exception as e:
+                print(f"Failed to refresh playlist {playlist_id}: {e}")
+                if playlist_id in existing:
+                    count = existing[playlist_id].video_count
+            
+            stats = existing.get(playlist_id)
+            if not stats:
+                stats = db.query(PlaylistStats).filter_by(playlist_id=playlist_id).first() or PlaylistStats(playlist_id=playlist_id)
+                db.add(stats)
+            stats.channel_id = channel_id
+            stats.title = entry.get('title')
+            stats.video_count = count
+            stats.position = position
+            stats.refreshed_at = now
+            seen.add(playlist_id)
+        
+        for playlist_id, stats in existing.items():
+            if playlist_id not in seen:
+                db.delete(stats)
+        channel.playlists_refreshed_at = now
+        db.commit()
+    finally:
+        db.close()
 
 @app.get("/api/v1/playlist/{playlist_id}")
 def get_playlist_videos(playlist_id: str, db: Session = Depends(get_db)):
@@ -406,8 +618,7 @@ def get_playlist_videos(playlist_id: str, db: Session = Depends(get_db)):
     return result
 
 @app.post("/api/v1/playlist/{playlist_id}/monitor")
-async def monitor_playlist(
-    background_tasks: BackgroundTasks,
+def monitor_playlist(
     playlist_id: str, 
     channel_id: int, 
     download_all: bool = True,
@@ -423,18 +634,40 @@ async def monitor_playlist(
         print(f"Playlist {playlist_id} already monitored, updating status")
         existing.monitored = True
         db.commit()
-        if download_all and background_tasks:
-            print(f"Adding background task for existing playlist {playlist_id}")
-            background_tasks.add_task(download_playlist_videos, playlist_id, channel_id)
+        if download_all:
+            return job_accepted(job_manager.submit(
+                'playlist_download', run_playlist_download, playlist_id, channel_id,
+                params={'playlist_id': playlist_id, 'channel_id': channel_id}
+            ))
         return {"status": "already_monitored"}
     
-    # Get playlist info
-    print(f"Fetching playlist info for {playlist_id}")
-    monitor = Monitor(db)
-    ydl_opts = {'quiet': True, 'extract_flat': True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(f'https://www.youtube.com/playlist?list={playlist_id}', download=False)
+    # Reading the playlist from YouTube is slow, so it runs as a job
+    return job_accepted(job_manager.submit(
+        'monitor_playlist', run_monitor_playlist, playlist_id, channel_id, download_all,
+        params={'playlist_id': playlist_id, 'channel_id': channel_id, 'download_all': download_all}
+    ))
+
+def run_playlist_download(job, playlist_id: str, channel_id: int):
+    download_playlist_videos(playlist_id, channel_id)
+    return {"status": "already_monitored"}
+
+def run_monitor_playlist(job, playlist_id: str, channel_id: int, download_all: bool):
+    db = SessionLocal()
+    try:
+        channel = db.query(Channel).filter_by(id=channel_id).first()
+        if not channel:
+            raise HTTPException(404, "Channel not found")
+        
+        # Get playlist info
+        print(f"Fetching playlist info for {playlist_id}")
+        monitor = Monitor(db)
+        ydl_opts = {'quiet': True, 'extract_flat': True}
+        with ydl_pool.checkout(ydl_opts) as ydl:
+            info = ydl.extract_info(f'https://www.youtube.com/playlist?list={playlist_id}', download=False)
         print(f"Got playlist info: {info.get('title')}")
+        monitor.update_playlist_membership(playlist_id, [
+            {'video_id': entry.get('id') if entry else None} for entry in info.get('entries') or []
+        ])
         
         playlist = Playlist(
             playlist_id=playlist_id,
@@ -450,13 +683,13 @@ async def monitor_playlist(
         print(f"Playlist saved to database with season {playlist.season_number}")
         
         # Download all videos in playlist if requested
-        print(f"download_all={download_all}, background_tasks={background_tasks}")
-        if download_all and background_tasks:
-            print(f"Adding background task for playlist {playlist_id}, channel {channel_id}")
-            background_tasks.add_task(download_playlist_videos, playlist_id, channel_id)
-            print("Background task added successfully")
+        if download_all:
+            job.update(progress=50, message="Queueing playlist videos")
+            download_playlist_videos(playlist_id, channel_id)
         
         return {"status": "monitoring", "playlist_id": playlist_id, "downloading": download_all}
+    finally:
+        db.close()
 
 @app.post("/api/v1/playlist/{playlist_id}/unmonitor")
 def unmonitor_playlist(playlist_id: str, db: Session = Depends(get_db)):
@@ -481,88 +714,58 @@ def download_playlist_videos(playlist_id: str, channel_id: int):
         try:
             videos = monitor.get_playlist_videos(f'https://www.youtube.com/playlist?list={playlist_id}')
             print(f"Found {len(videos)} videos in playlist")
+            monitor.update_playlist_membership(playlist_id, videos)
         except Exception as e:
             print(f"ERROR fetching playlist videos: {e}")
             import traceback
             traceback.print_exc()
             return
         
+        # Prepare the season folder and poster once, before any episode is queued,
+        # so parallel workers never race on them
         settings = get_settings()
         downloader = Downloader()
+        download_path = playlist.download_path or channel.download_path or settings.get('defaultPath', '/downloads')
+        season_dir = downloader.get_season_dir(download_path, channel.channel_name, playlist.season_number, playlist.title)
+        first_video_id = next((v['video_id'] for v in videos if v.get('video_id')), None)
+        if first_video_id:
+            os.makedirs(season_dir, exist_ok=True)
+            downloader.download_season_poster(season_dir, f"https://i.ytimg.com/vi/{first_video_id}/maxresdefault.jpg")
         
-        # Get playlist thumbnail from first video
-        playlist_thumbnail = None
-        if videos and len(videos) > 0:
-            first_video_id = videos[0].get('video_id')
-            if first_video_id:
-                playlist_thumbnail = f"https://i.ytimg.com/vi/{first_video_id}/maxresdefault.jpg"
-        
-        downloaded_count = 0
+        # Episode numbers follow playlist position (including unavailable entries),
+        # and videos are queued in that order
+        rows = []
         skipped_count = 0
-        failed_count = 0
-        
         for idx, vid in enumerate(videos, 1):
             # Skip if video_id is None (unavailable/hidden videos)
             if not vid.get('video_id'):
                 print(f"Skipping unavailable video at position {idx}")
                 skipped_count += 1
                 continue
-            
-            video = db.query(Video).filter_by(video_id=vid['video_id']).first()
-            if not video:
-                video = Video(
-                    video_id=vid['video_id'],
-                    channel_id=channel_id,
-                    title=vid.get('title', 'Unknown'),
-                    publish_date=datetime.now(),
-                    season_number=playlist.season_number,
-                    episode_number=idx,
-                    playlist_id=playlist_id
-                )
-                db.add(video)
-                db.commit()
-            
-            if not video.downloaded:
-                try:
-                    print(f"Downloading video {idx}/{len(videos)}: {video.title}")
-                    video.download_status = 'downloading'
-                    db.commit()
-                    
-                    path = downloader.download_video(
-                        video.video_id,
-                        channel.channel_name,
-                        playlist.download_path or settings.get('defaultPath', '/downloads'),
-                        playlist.quality,
-                        playlist.season_number,
-                        idx,
-                        settings.get('namingFormat', 'standard'),
-                        settings.get('customNaming'),
-                        playlist.title,  # Pass playlist title as season name
-                        channel.thumbnail  # Pass channel thumbnail
-                    )
-                    
-                    video.downloaded = True
-                    video.download_path = path
-                    video.download_status = 'completed'
-                    db.commit()
-                    downloaded_count += 1
-                    print(f"Successfully downloaded: {video.title}")
-                    
-                    # Download season poster on first video
-                    if idx == 1 and playlist_thumbnail:
-                        import os
-                        season_dir = os.path.dirname(path)
-                        downloader.download_season_poster(season_dir, playlist_thumbnail)
-                    
-                except Exception as e:
-                    video.download_status = 'failed'
-                    db.commit()
-                    failed_count += 1
-                    print(f"ERROR downloading {video.title}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-        
-        print(f"Playlist download complete. Downloaded: {downloaded_count}, Skipped: {skipped_count}, Failed: {failed_count}")
+            rows.append({
+                'video_id': vid['video_id'],
+                'channel_id': channel_id,
+                'title': vid.get('title', 'Unknown'),
+                'publish_date': datetime.now(),
+                'uploaded_at': vid.get('uploaded_at'),
+                'season_number': playlist.season_number,
+                'episode_number': idx,
+                'playlist_id': playlist_id
+            })
+        
+        ingestor = VideoIngestor(db)
+        ingestor.upsert(
+            rows,
+            update=['season_number', 'episode_number', 'playlist_id'],
+            fill=['uploaded_at'],
+            update_where=Video.downloaded.isnot(True)
+        )
+        db.commit()
+        
+        pending = [video for video in ingestor.load(row['video_id'] for row in rows) if not video.downloaded]
+        queued_count = download_pool.enqueue_many(db, pending)
+        
+        print(f"Playlist queued. Queued: {queued_count}, Skipped: {skipped_count}")
     except Exception as e:
         print(f"FATAL ERROR in download_playlist_videos: {str(e)}")
         import traceback
@@ -570,42 +773,47 @@ def download_playlist_videos(playlist_id: str, channel_id: int):
     finally:
         db.close()
 
-@app.post("/api/v1/channel", response_model=ChannelResponse)
-def add_channel(channel: ChannelCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    downloader = Downloader()
-    info = downloader.get_channel_info(channel.channel_url)
-    
-    # Get full channel info including description
-    ydl_opts = {'quiet': True, 'extract_flat': True}
-    description = None
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        try:
-            ch_info = ydl.extract_info(channel.channel_url, download=False)
-            description = ch_info.get('description', '')
-        except:
-            pass
-    
-    new_channel = Channel(
-        channel_url=channel.channel_url,
-        channel_id=info['channel_id'],
-        channel_name=info['channel_name'],
-        thumbnail=info.get('thumbnail'),
-        description=description,
-        download_path=channel.download_path,
-        quality=channel.quality,
-        monitored=channel.monitored
-    )
-    
-    db.add(new_channel)
-    db.commit()
-    db.refresh(new_channel)
-    
-    # Fetch all videos in background
-    background_tasks.add_task(fetch_channel_videos, new_channel.id)
-    
-    return new_channel
+@app.post("/api/v1/channel")
+def add_channel(channel: ChannelCreate):
+    """Look the channel up on YouTube in a job; the job result is the new channel"""
+    return job_accepted(job_manager.submit('add_channel', run_add_channel, channel, params={'url': channel.channel_url}))
 
-def fetch_channel_videos(channel_id: int):
+def run_add_channel(job, channel: ChannelCreate):
+    db = SessionLocal()
+    try:
+        downloader = Downloader(metadata_cache)
+        info = downloader.get_channel_info(channel.channel_url)
+        if db.query(Channel).filter_by(channel_id=info['channel_id']).first():
+            raise HTTPException(400, f"Channel {info['channel_name']} is already added")
+        
+        new_channel = Channel(
+            channel_url=channel.channel_url,
+            channel_id=info['channel_id'],
+            channel_name=info['channel_name'],
+            thumbnail=info.get('thumbnail'),
+            description=info.get('description') or '',
+            download_path=channel.download_path,
+            quality=channel.quality,
+            monitored=channel.monitored
+        )
+        
+        db.add(new_channel)
+        db.commit()
+        db.refresh(new_channel)
+        
+        # Fetch all videos in a follow-up job
+        job_manager.submit('channel_videos', run_fetch_channel_videos, new_channel.id, params={'channel_id': new_channel.id})
+        sync_scheduler.schedule_channel(new_channel.id)
+        
+        return ChannelResponse.model_validate(new_channel).model_dump()
+    finally:
+        db.close()
+
+def run_fetch_channel_videos(job, channel_id: int, full: bool = False):
+    fetch_channel_videos(channel_id, full)
+    return {"status": "synced", "full": full}
+
+def fetch_channel_videos(channel_id: int, full: bool = False):
     db = SessionLocal()
     try:
         channel = db.query(Channel).filter_by(id=channel_id).first()
@@ -613,35 +821,35 @@ def fetch_channel_videos(channel_id: int):
             return
         
         monitor = Monitor(db)
-        videos = monitor.get_channel_videos(channel, limit=None)
-        for vid in videos:
-            existing = db.query(Video).filter_by(video_id=vid['video_id']).first()
-            if not existing:
-                video = Video(
-                    video_id=vid['video_id'],
-                    channel_id=channel.id,
-                    title=vid['title'],
-                    publish_date=datetime.now(),
-                    download_status='available',
-                    duration=vid.get('duration')
-                )
-                db.add(video)
-            else:
-                # Update existing video with duration if missing
-                if not existing.duration and vid.get('duration'):
-                    existing.duration = vid.get('duration')
+        videos = monitor.sync_channel_videos(channel, full=full)
+        # Existing videos only get their duration and upload time filled in if missing
+        new_ids = VideoIngestor(db).upsert([{
+            'video_id': vid['video_id'],
+            'channel_id': channel.id,
+            'title': vid['title'],
+            'publish_date': datetime.now(),
+            'download_status': 'available',
+            'duration': vid.get('duration'),
+            'uploaded_at': vid.get('uploaded_at')
+        } for vid in videos], fill=['duration', 'uploaded_at'])
+        channel.last_sync = datetime.utcnow()
         db.commit()
+        # Newest first, so the first page of the channel grid is warm
+        prefetch_thumbnails(vid['video_id'] for vid in videos if vid['video_id'] in new_ids)
     finally:
         db.close()
 
 @app.post("/api/v1/channel/{channel_id}/sync")
-def sync_channel(channel_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def sync_channel(channel_id: int, full: bool = False, db: Session = Depends(get_db)):
+    """Sync new uploads; full=true re-enumerates the whole uploads tab"""
     channel = db.query(Channel).filter_by(id=channel_id).first()
     if not channel:
         raise HTTPException(404, "Channel not found")
     
-    background_tasks.add_task(fetch_channel_videos, channel_id)
-    return {"status": "syncing"}
+    return job_accepted(job_manager.submit(
+        'channel_videos', run_fetch_channel_videos, channel_id, full,
+        params={'channel_id': channel_id, 'full': full}
+    ))
 
 @app.delete("/api/v1/channel/{channel_id}")
 def delete_channel(channel_id: int, db: Session = Depends(get_db)):
@@ -654,7 +862,11 @@ def delete_channel(channel_id: int, db: Session = Depends(get_db)):
     
     # Delete the channel
     db.delete(channel)
+    LibraryStats.reconcile(db, [channel_id])
+    db.query(ChannelStats).filter_by(channel_id=channel_id).delete()
+    db.query(EpisodeSequence).filter_by(channel_id=channel_id).delete()
     db.commit()
+    sync_scheduler.unschedule_channel(channel_id)
     return {"status": "deleted"}
 
 @app.patch("/api/v1/channel/{channel_id}/monitor")
@@ -664,11 +876,73 @@ def toggle_monitor(channel_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "Channel not found")
     channel.monitored = not channel.monitored
     db.commit()
+    sync_scheduler.schedule_channel(channel_id)
     return {"monitored": channel.monitored}
 
+# Rows fetched from the database cursor per chunk of the NDJSON stream
+VIDEO_STREAM_CHUNK = 1000
+
+def video_list_query(channel_id: Optional[int], status: Optional[str]):
+    query = select(
+        Video.id, Video.video_id, Video.title, Video.publish_date, Video.downloaded, Video.channel_id
+    ).where(Video.channel_id.isnot(None))
+    if channel_id is not None:
+        query = query.where(Video.channel_id == channel_id)
+    if status:
+        query = query.where(Video.download_status == status)
+    return query.order_by(Video.publish_date.desc(), Video.id.desc())
+
+def stream_videos(query):
+    """Yield NDJSON lines, reading the result in chunks so memory stays flat"""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=VIDEO_STREAM_CHUNK).execute(query)
+        for rows in result.partitions():
+            yield ''.join(json.dumps({
+                'id': row.id,
+                'video_id': row.video_id,
+                'title': row.title,
+                'publish_date': row.publish_date.isoformat() if row.publish_date else None,
+                'downloaded': bool(row.downloaded),
+                'channel_id': row.channel_id
+            }) + '\n' for row in rows)
+
 @app.get("/api/v1/video", response_model=List[VideoResponse])
-def get_videos(db: Session = Depends(get_db)):
-    return db.query(Video).filter(Video.channel_id.isnot(None)).order_by(Video.publish_date.desc()).all()
+def get_videos(channel_id: Optional[int] = None, status: Optional[str] = None, stream: bool = False, db: Session = Depends(get_db)):
+    query = video_list_query(channel_id, status)
+    if stream:
+        return StreamingResponse(stream_videos(query), media_type='application/x-ndjson')
+    return [dict(row._mapping) for row in db.execute(query)]
+
+@app.get("/api/v1/video/{video_id}/artwork")
+def get_video_artwork(video_id: str, width: Optional[int] = None, db: Session = Depends(get_db)):
+    """Serve the episode's local thumbnail; videos without one fall back to the YouTube image"""
+    video = db.query(Video).filter_by(video_id=video_id).first()
+    if not video:
+        raise HTTPException(404, "Video not found")
+    path = local_artwork.find(video.download_path) if video.downloaded else None
+    if not path:
+        return RedirectResponse(proxied_thumbnail(video_id))
+    return FileResponse(
+        local_artwork.variant(path, width),
+        headers={'Cache-Control': f'public, max-age={IMAGE_BROWSER_MAX_AGE}'}
+    )
+
+@app.get("/api/v1/channel/{channel_id}/artwork")
+def get_channel_artwork(channel_id: int, width: Optional[int] = None, db: Session = Depends(get_db)):
+    """Serve the show's local poster.jpg, falling back to the channel's YouTube avatar"""
+    channel = db.query(Channel).filter_by(id=channel_id).first()
+    if not channel:
+        raise HTTPException(404, "Channel not found")
+    download_path = channel.download_path or get_settings().get('defaultPath', '/downloads')
+    path = os.path.join(Downloader().get_channel_dir(download_path, channel.channel_name), 'poster.jpg')
+    if not os.path.isfile(path):
+        if not channel.thumbnail:
+            raise HTTPException(404, "Channel has no artwork")
+        return RedirectResponse(f"/api/v1/proxy/image?url={quote(channel.thumbnail, safe='')}")
+    return FileResponse(
+        local_artwork.variant(path, width),
+        headers={'Cache-Control': f'public, max-age={IMAGE_BROWSER_MAX_AGE}'}
+    )
 
 @app.post("/api/v1/video/{video_id}/download")
 def download_video(video_id: int, db: Session = Depends(get_db)):
@@ -676,28 +950,14 @@ def download_video(video_id: int, db: Session = Depends(get_db)):
     if not video:
         raise HTTPException(404, "Video not found")
     
-    channel = db.query(Channel).filter_by(id=video.channel_id).first()
-    downloader = Downloader()
-    
-    try:
-        path = downloader.download_video(
-            video.video_id,
-            channel.channel_name,
-            channel.download_path,
-            channel.quality
-        )
-        video.downloaded = True
-        video.download_path = path
-        db.commit()
-        return {"status": "success", "path": path}
-    except Exception as e:
-        raise HTTPException(500, str(e))
+    item = download_pool.enqueue(db, video)
+    return {"status": "queued", "queue_id": item.id}
 
 class VideoDownloadRequest(BaseModel):
     channel_id: int
 
 @app.post("/api/v1/video/download/{youtube_video_id}")
-def download_video_by_id(youtube_video_id: str, request: VideoDownloadRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def download_video_by_id(youtube_video_id: str, request: VideoDownloadRequest, db: Session = Depends(get_db)):
     channel = db.query(Channel).filter_by(id=request.channel_id).first()
     if not channel:
         raise HTTPException(404, "Channel not found")
@@ -713,12 +973,9 @@ def download_video_by_id(youtube_video_id: str, request: VideoDownloadRequest, b
         )
         db.add(video)
         db.commit()
-    else:
-        video.download_status = 'queued'
-        db.commit()
     
-    background_tasks.add_task(background_download, youtube_video_id, channel.id)
-    return {"status": "queued", "message": "Download started in background"}
+    item = download_pool.enqueue(db, video)
+    return {"status": "queued", "queue_id": item.id, "message": "Download queued"}
 
 @app.delete("/api/v1/video/{video_id}")
 def delete_video(video_id: str, db: Session = Depends(get_db)):
@@ -739,17 +996,64 @@ def delete_video(video_id: str, db: Session = Depends(get_db)):
     
     return {"status": "deleted"}
 
-@app.post("/api/v1/command/sync")
-def sync_channels(db: Session = Depends(get_db)):
+def queue_new_videos(db: Session, channel: Channel, videos: List[Video]):
+    """Download stage for channel syncs: hand discovered videos to the worker pool"""
+    prefetch_thumbnails(video.video_id for video in videos)
+    for video in videos:
+        download_pool.enqueue(db, video)
+
+def sync_all_channels(db: Session, on_progress=None):
     monitor = Monitor(db)
-    new_videos = monitor.check_all_channels()
-    return {"status": "success", "new_videos": len(new_videos)}
+    return monitor.check_all_channels(
+        SessionLocal,
+        on_new_videos=queue_new_videos,
+        max_workers=get_settings().get('syncWorkers', 4),
+        on_progress=on_progress
+    )
+
+@app.post("/api/v1/command/sync")
+def sync_channels():
+    return job_accepted(job_manager.submit('sync', run_sync_all))
+
+def run_sync_all(job):
+    db = SessionLocal()
+    try:
+        with sync_scheduler.gate.sync():
+            new_videos = sync_all_channels(
+                db,
+                on_progress=lambda done, total: job.update(progress=done * 100 / total, message=f"{done}/{total} channels")
+            )
+        return {"status": "success", "new_videos": len(new_videos)}
+    finally:
+        db.close()
+
+def run_membership_backfill(job):
+    db = SessionLocal()
+    try:
+        refreshed = Monitor(db).backfill_playlist_membership(
+            on_progress=lambda done, total: job.update(progress=done * 100 / total, message=f"{done}/{total} playlists")
+        )
+        return {"refreshed": refreshed}
+    finally:
+        db.close()
+
+@app.get("/api/v1/jobs")
+def list_jobs(status: Optional[str] = None, kind: Optional[str] = None):
+    return jsonable_encoder([job.to_dict() for job in job_manager.list(status, kind)])
+
+@app.get("/api/v1/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return jsonable_encoder(job.to_dict())
 
 @app.get("/api/v1/system/status")
 def system_status(db: Session = Depends(get_db)):
     channel_count = db.query(Channel).count()
-    video_count = db.query(Video).count()
-    downloaded_count = db.query(Video).filter_by(downloaded=True).count()
+    library = LibraryStats.get(db)
+    video_count = library['total']
+    downloaded_count = library['downloaded']
     
     # Get yt-dlp version
     try:
@@ -761,10 +1065,23 @@ def system_status(db: Session = Depends(get_db)):
         "channels": channel_count,
         "videos": video_count,
         "downloaded": downloaded_count,
+        "failed": library['failed'],
+        "bytes": library['bytes'],
         "ytdlp_version": ytdlp_version,
+        "ytdlp_pool": ydl_pool.stats(),
         "app_version": "1.0.2"
     }
 
+@app.get("/api/v1/system/cache")
+def cache_status():
+    return {**metadata_cache.stats(), 'images': image_cache.stats()}
+
+@app.delete("/api/v1/system/cache")
+def clear_cache(kind: Optional[str] = None):
+    if kind == 'images':
+        return {"removed": image_cache.clear()}
+    return {"removed": metadata_cache.invalidate(kind=kind)}
+
 @app.get("/api/v1/settings")
 def get_settings():
     settings_file = f'{CONFIG_PATH}/settings.json'
@@ -777,7 +1094,14 @@ def get_settings():
         "defaultQuality": "1080p",
         "autoSync": False,
         "syncInterval": 15,
+        "rescanInterval": 0,
         "theme": "dark",
+        "downloadWorkers": 3,
+        "playlistConcurrency": 2,
+        "postprocessWorkers": 2,
+        "syncWorkers": 4,
+        "jobWorkers": 4,
+        "longJobWorkers": 2,
         "namingFormat": "standard",
         "customNaming": "{channel} - S{season:00}E{episode:000} - {title}"
     }
@@ -787,6 +1111,7 @@ def save_settings(settings: dict):
     settings_file = f'{CONFIG_PATH}/settings.json'
     with open(settings_file, 'w') as f:
         json.dump(settings, f, indent=2)
+    sync_scheduler.configure(settings)
     return {"status": "saved"}
 
 @app.post("/api/v1/settings/generate-key")
@@ -801,177 +1126,198 @@ def generate_api_key():
 @app.post("/api/v1/command/rescan")
 def rescan_files(db: Session = Depends(get_db)):
     """Scan download folders and update database with actual file status"""
+    with sync_scheduler.gate.rescan():
+        return rescan_library(db)
+
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.webm')
+
+def library_files(channel_folder: str):
+    """Video files anywhere under a channel folder, including its season and Specials folders"""
+    pattern = os.path.join(glob.escape(channel_folder), '**', '*')
+    return [path for path in glob.glob(pattern, recursive=True) if path.lower().endswith(VIDEO_EXTENSIONS)]
+
+def rescan_library(db: Session):
     channels = db.query(Channel).all()
+    downloader = Downloader()
     updated = 0
     imported = 0
     
     for channel in channels:
-        channel_folder = os.path.join(channel.download_path, channel.channel_name)
+        # Nothing to compare against for channels without a download folder
+        if not channel.download_path:
+            continue
+        channel_folder = downloader.get_channel_dir(channel.download_path, channel.channel_name)
         
         # Get all video files in channel folder
-        video_files = []
-        if os.path.exists(channel_folder):
-            video_files = glob.glob(os.path.join(channel_folder, "*.mkv")) + \
-                         glob.glob(os.path.join(channel_folder, "*.mp4")) + \
-                         glob.glob(os.path.join(channel_folder, "*.webm"))
+        video_files = library_files(channel_folder) if os.path.isdir(channel_folder) else []
         
         # Get all videos for this channel
         db_videos = db.query(Video).filter_by(channel_id=channel.id).all()
+        videos_by_id = {video.video_id: video for video in db_videos}
+        new_rows = []
         
-        if not video_files:
-            # No files exist - mark all as not downloaded
-            for video in db_videos:
-                if video.downloaded:
-                    video.downloaded = False
-                    video.download_status = 'pending'
-                    video.download_path = None
-                    updated += 1
-        else:
-            # Check each file
-            video_ids_on_disk = set()
-            for filepath in video_files:
-                filename = os.path.basename(filepath)
+        # Check each file
+        video_ids_on_disk = set()
+        for filepath in video_files:
+            filename = os.path.basename(filepath)
+            
+            # Try to extract video ID from filename
+            video_id = None
+            if '[' in filename and ']' in filename:
+                video_id = filename.split('[')[-1].split(']')[0]
+                video_ids_on_disk.add(video_id)
                 
-                # Try to extract video ID from filename
-                video_id = None
-                if '[' in filename and ']' in filename:
-                    video_id = filename.split('[')[-1].split(']')[0]
-                    video_ids_on_disk.add(video_id)
+                # Check if video exists in DB
+                video = videos_by_id.get(video_id)
+                if video:
+                    if not video.downloaded:
+                        video.downloaded = True
+                        video.download_status = 'completed'
+                        video.download_path = filepath
+                        updated += 1
+                else:
+                    # Import new video
+                    title = filename.rsplit('.', 1)[0]
+                    if '[' in title:
+                        title = title.rsplit('[', 1)[0].strip()
                     
-                    # Check if video exists in DB
-                    video = db.query(Video).filter_by(video_id=video_id, channel_id=channel.id).first()
-                    if video:
-                        if not video.downloaded:
-                            video.downloaded = True
-                            video.download_status = 'completed'
-                            video.download_path = filepath
-                            updated += 1
-                    else:
-                        # Import new video
-                        title = filename.rsplit('.', 1)[0]
-                        if '[' in title:
-                            title = title.rsplit('[', 1)[0].strip()
-                        
-                        new_video = Video(
-                            video_id=video_id,
-                            channel_id=channel.id,
-                            title=title,
-                            publish_date=datetime.fromtimestamp(os.path.getmtime(filepath)),
-                            downloaded=True,
-                            download_status='completed',
-                            download_path=filepath
-                        )
-                        db.add(new_video)
-                        imported += 1
-            
-            # Mark videos as not downloaded if file doesn't exist
-            for video in db_videos:
-                if video.downloaded and video.video_id not in video_ids_on_disk:
-                    video.downloaded = False
-                    video.download_status = 'pending'
-                    video.download_path = None
-                    updated += 1
+                    new_rows.append({
+                        'video_id': video_id,
+                        'channel_id': channel.id,
+                        'title': title,
+                        'publish_date': datetime.fromtimestamp(os.path.getmtime(filepath)),
+                        'downloaded': True,
+                        'download_status': 'completed',
+                        'download_path': filepath
+                    })
+        
+        # Mark videos as not downloaded if file doesn't exist. Downloaded episodes are
+        # named without their video ID, so their recorded path is what gets checked.
+        for video in db_videos:
+            if not video.downloaded or video.video_id in video_ids_on_disk:
+                continue
+            if video.download_path and os.path.exists(video.download_path):
+                continue
+            video.downloaded = False
+            video.download_status = 'pending'
+            video.download_path = None
+            updated += 1
+        
+        imported += len(VideoIngestor(db).upsert(new_rows))
     
     db.commit()
     return {"status": "success", "updated": updated, "imported": imported}
 
+@app.post("/api/v1/command/reconcile")
+def reconcile_stats(db: Session = Depends(get_db)):
+    """Recount the library counters from the videos table"""
+    LibraryStats.reconcile(db)
+    db.commit()
+    return {"status": "success", "library": LibraryStats.get(db)}
+
 @app.get("/api/v1/history")
-def get_history(db: Session = Depends(get_db)):
-    videos = db.query(Video).filter_by(downloaded=True).order_by(Video.publish_date.desc()).limit(50).all()
-    result = []
-    for v in videos:
-        channel = db.query(Channel).filter_by(id=v.channel_id).first()
-        result.append({
-            'id': v.id,
-            'video_id': v.video_id,
-            'video_title': v.title,
-            'channel_name': channel.channel_name if channel else 'Unknown',
-            'downloaded_at': v.publish_date
-        })
-    return result
+def get_history(channel_id: Optional[int] = None, limit: int = 50, db: Session = Depends(get_db)):
+    return [{
+        'id': row['id'],
+        'video_id': row['video_id'],
+        'video_title': row['title'],
+        'channel_name': row['channel_name'] or 'Unknown',
+        'downloaded_at': row['publish_date']
+    } for row in ActivityView(db).history(channel_id, limit)]
 
 @app.get("/api/v1/queue")
-def get_queue(db: Session = Depends(get_db)):
-    # Get all videos that are queued or downloading
-    videos = db.query(Video).filter(Video.download_status.in_(['pending', 'queued', 'downloading'])).order_by(Video.publish_date.desc()).limit(50).all()
-    result = []
-    for v in videos:
-        channel = db.query(Channel).filter_by(id=v.channel_id).first()
-        if channel:
-            status_map = {
-                'pending': 'Pending',
-                'queued': 'Queued',
-                'downloading': '⬇️ Downloading...'
-            }
-            result.append({
-                'id': v.id,
-                'video_id': v.video_id,
-                'title': v.title,
-                'channel_id': v.channel_id,
-                'channel_name': channel.channel_name,
-                'publish_date': v.publish_date,
-                'status': status_map.get(v.download_status, v.download_status)
-            })
-    return result
+def get_queue(status: Optional[str] = None, channel_id: Optional[int] = None, limit: int = 50, db: Session = Depends(get_db)):
+    if status and status not in ActivityView.QUEUE_STATUSES:
+        raise HTTPException(400, f"status must be one of: {', '.join(ActivityView.QUEUE_STATUSES)}")
+    status_map = {
+        'pending': 'Pending',
+        'queued': 'Queued',
+        'downloading': '⬇️ Downloading...',
+        'processing': 'Processing...'
+    }
+    return [{
+        'id': row['id'],
+        'video_id': row['video_id'],
+        'title': row['title'],
+        'channel_id': row['channel_id'],
+        'channel_name': row['channel_name'],
+        'publish_date': row['publish_date'],
+        'status': status_map.get(row['download_status'], row['download_status']),
+        'progress': row['progress'] or 0
+    } for row in ActivityView(db).queue(status, channel_id, limit)]
 
 # Background scheduler
-def scheduled_sync():
+def scheduled_channel_sync(channel_id: int):
     db = SessionLocal()
-    monitor = Monitor(db)
-    monitor.check_all_channels()
-    db.close()
+    try:
+        Monitor(db).sync_channel_job(SessionLocal, channel_id, queue_new_videos)
+    finally:
+        db.close()
 
 def scheduled_rescan():
     db = SessionLocal()
-    # Run rescan logic
-    channels = db.query(Channel).all()
-    for channel in channels:
-        channel_folder = os.path.join(channel.download_path, channel.channel_name)
-        video_files = []
-        if os.path.exists(channel_folder):
-            video_files = glob.glob(os.path.join(channel_folder, "*.mkv")) + \
-                         glob.glob(os.path.join(channel_folder, "*.mp4")) + \
-                         glob.glob(os.path.join(channel_folder, "*.webm"))
-        
-        if not video_files:
-            # Mark all as not downloaded
-            for video in db.query(Video).filter_by(channel_id=channel.id, downloaded=True).all():
-                video.downloaded = False
-                video.download_status = 'pending'
-                video.download_path = None
-        else:
-            video_ids_on_disk = set()
-            for filepath in video_files:
-                filename = os.path.basename(filepath)
-                if '[' in filename and ']' in filename:
-                    video_id = filename.split('[')[-1].split(']')[0]
-                    video_ids_on_disk.add(video_id)
-            
-            for video in db.query(Video).filter_by(channel_id=channel.id, downloaded=True).all():
-                if video.video_id not in video_ids_on_disk:
-                    video.downloaded = False
-                    video.download_status = 'pending'
-                    video.download_path = None
-    
-    db.commit()
-    db.close()
+    try:
+        rescan_library(db)
+    finally:
+        db.close()
 
 scheduler = BackgroundScheduler()
 
-# @app.on_event("startup")
-# def startup_event():
-#     scheduler.add_job(scheduled_sync, 'interval', minutes=15)
-#     scheduler.add_job(scheduled_rescan, 'interval', minutes=5)
-#     scheduler.start()
+# Persistent download workers, fed from the queue table
+download_pool = DownloadWorkerPool(
+    SessionLocal,
+    run_queued_download,
+    workers=os.getenv('TUBARR_DOWNLOAD_WORKERS') or get_settings().get('downloadWorkers', 3),
+    playlist_concurrency=get_settings().get('playlistConcurrency'),
+    write_queue=write_queue,
+    postprocess_workers=os.getenv('TUBARR_POSTPROCESS_WORKERS') or get_settings().get('postprocessWorkers', 2)
+)
+
+# Slow request work (yt-dlp lookups, full syncs) runs as jobs; updates are pushed over the WebSocket
+event_loop = None
+
+def push_job_update(job):
+    # Jobs run on worker threads, so hand the broadcast to the server's event loop
+    if event_loop and ws_manager.active_connections:
+        asyncio.run_coroutine_threadsafe(ws_manager.send_job_update(jsonable_encoder(job.to_dict())), event_loop)
+
+def job_accepted(job):
+    return JSONResponse(status_code=202, content={"job_id": job.id, "kind": job.kind, "status": job.status})
+
+# Syncs, enumerations and playlist work get their own workers so searches and adds stay quick
+job_manager = JobManager(
+    workers=get_settings().get('jobWorkers', 4),
+    long_workers=get_settings().get('longJobWorkers', 2),
+    long_kinds=('sync', 'channel_videos', 'playlists_refresh', 'monitor_playlist', 'playlist_download', 'playlist_membership'),
+    notify=push_job_update
+)
+
+# Per-channel sync jobs, paced by each channel's upload cadence
+sync_scheduler = SyncScheduler(scheduler, SessionLocal, scheduled_channel_sync, rescan=scheduled_rescan)
+
+# Counters are built once for databases that predate channel_stats
+with SessionLocal() as db:
+    if not db.query(ChannelStats).filter_by(channel_id=0).first():
+        LibraryStats.reconcile(db)
+        db.commit()
 
-# @app.on_event("shutdown")
-# def shutdown_event():
-#     scheduler.shutdown()
 scheduler.start()
+sync_scheduler.configure(get_settings())
+download_pool.start()
+
+# Index playlists that were monitored before their membership was stored
+with SessionLocal() as db:
+    if Monitor(db).playlists_without_membership().first():
+        job_manager.submit('playlist_membership', run_membership_backfill)
+
+# Build the flat-listing and metadata yt-dlp instances before the first request needs them
+threading.Thread(target=ydl_pool.warm, args=([{'quiet': True, 'extract_flat': True}, {'quiet': True}],), daemon=True).start()
 
 # WebSocket endpoint
 @app.websocket("/api/v1/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    global event_loop
+    event_loop = asyncio.get_running_loop()
     await ws_manager.connect(websocket)
     try:
         while True:
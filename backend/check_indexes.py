@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Query plan check - fails if a hot query falls back to a full table scan.
+
+Builds the queries used by get_channel_detail, get_queue, get_history and the
+per-channel counter recount and runs EXPLAIN QUERY PLAN on them. By default
+the schema comes from the models (in memory); pass --db to check an existing
+database, e.g. after running migrate.py.
+
+Keep the queries below in step with backend/api/main.py,
+backend/services/library_stats.py and backend/services/activity.py.
+"""
+import argparse
+import re
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text, func
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import sessionmaker
+from backend.models import Base, Video
+from backend.services.pagination import Keyset
+from backend.services.activity import ActivityView
+from backend.services.download_queue import DownloadWorkerPool
+
+# A plan step like "SCAN videos" (no index) means every row is read
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING (COVERING )?INDEX)')
+
+def hot_queries(db):
+    channel_videos = db.query(Video).filter_by(channel_id=1).filter(Video.duration.isnot(None))
+    date_desc = Keyset(Video.publish_date, Video.id, descending=True)
+    date_asc = Keyset(Video.publish_date, Video.id)
+    title = Keyset(Video.title, Video.id)
+    last_date = datetime(2024, 1, 1)
+    return {
+        'get_channel_detail date_desc': channel_videos.order_by(*date_desc.order_by()).limit(26),
+        'get_channel_detail date_desc next page': channel_videos.filter(date_desc.after(last_date, 100)).order_by(*date_desc.order_by()).limit(26),
+        'get_channel_detail date_asc next page': channel_videos.filter(date_asc.after(last_date, 100)).order_by(*date_asc.order_by()).limit(26),
+        'get_channel_detail title next page': channel_videos.filter(title.after('m', 100)).order_by(*title.order_by()).limit(26),
+        'get_channel_detail downloaded': channel_videos.filter_by(downloaded=True).order_by(*date_desc.order_by()).limit(26),
+        'get_channel_detail available next page': channel_videos.filter_by(downloaded=False).filter(date_desc.after(last_date, 100)).order_by(*date_desc.order_by()).limit(26),
+        'channel stats recount': db.query(Video.channel_id, func.count(Video.id)).filter(Video.channel_id.in_([1, 2])).group_by(Video.channel_id),
+        'get_queue': ActivityView(db).queue_query(),
+        'get_queue by channel': ActivityView(db).queue_query('downloading', 1),
+        'get_history': ActivityView(db).history_query(),
+        'get_history by channel': ActivityView(db).history_query(1),
+        'download queue claim': DownloadWorkerPool.claim_query(db),
+        'sync cadence': db.query(Video.uploaded_at).filter(Video.channel_id == 1, Video.uploaded_at.isnot(None)).order_by(Video.uploaded_at.desc()).limit(20),
+        'download queue claim with capped playlists': DownloadWorkerPool.claim_query(db, ['PL1', 'PL2']),
+    }
+
+def check(engine):
+    db = sessionmaker(bind=engine)()
+    failures = []
+    try:
+        with engine.connect() as conn:
+            for name, query in hot_queries(db).items():
+                sql = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+                plan = [row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+                scans = [step for step in plan if FULL_SCAN.match(step)]
+                status = 'FULL SCAN' if scans else 'ok'
+                print(f"{status:9} {name}: {' | '.join(plan)}")
+                if scans:
+                    failures.append(name)
+    finally:
+        db.close()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='Path to an existing tubarr.db to check instead of the model schema')
+    args = parser.parse_args()
+
+    if args.db:
+        engine = create_engine(f'sqlite:///{args.db}')
+    else:
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+
+    failures = check(engine)
+    if failures:
+        print(f"{len(failures)} queries fall back to a full scan: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print("All hot queries use an index.")
@@ -93,9 +93,250 @@ def migrate():
         set_db_version(cursor, 2)
         print("Migration 2 complete.")
     
+    # Migration 3: Track worker state on the download queue
+    if current_version < 3:
+        print("Applying migration 3: Add download queue worker columns...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id INTEGER,
+                status TEXT DEFAULT 'queued',
+                progress INTEGER DEFAULT 0,
+                added DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (video_id) REFERENCES videos(id)
+            )
+        """)
+        for column in ("started DATETIME", "finished DATETIME", "error TEXT"):
+            try:
+                cursor.execute(f"ALTER TABLE queue ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass
+        set_db_version(cursor, 3)
+        print("Migration 3 complete.")
+    
+    # Migration 4: Per-channel sync high-water mark
+    if current_version < 4:
+        print("Applying migration 4: Add channel high-water mark...")
+        try:
+            cursor.execute("ALTER TABLE channels ADD COLUMN last_video_id TEXT")
+        except sqlite3.OperationalError:
+            pass
+        set_db_version(cursor, 4)
+        print("Migration 4 complete.")
+    
+    # Migration 5: Conditional GET validators for channel feeds
+    if current_version < 5:
+        print("Applying migration 5: Add channel feed validators...")
+        for column in ("feed_etag TEXT", "feed_modified TEXT"):
+            try:
+                cursor.execute(f"ALTER TABLE channels ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass
+        set_db_version(cursor, 5)
+        print("Migration 5 complete.")
+    
+    # Migration 6: Playlist membership index
+    if current_version < 6:
+        print("Applying migration 6: Create playlist_videos table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS playlist_videos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                playlist_id TEXT,
+                video_id TEXT,
+                position INTEGER,
+                UNIQUE (playlist_id, video_id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_playlist_videos_playlist_id ON playlist_videos (playlist_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_playlist_videos_video_id ON playlist_videos (video_id)")
+        set_db_version(cursor, 6)
+        print("Migration 6 complete.")
+    
+    # Migration 7: yt-dlp metadata cache
+    if current_version < 7:
+        print("Applying migration 7: Create metadata_cache table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metadata_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT,
+                url TEXT,
+                data TEXT,
+                size INTEGER,
+                fetched_at DATETIME,
+                expires_at DATETIME,
+                accessed_at DATETIME
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_metadata_cache_expires_at ON metadata_cache (expires_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_metadata_cache_accessed_at ON metadata_cache (accessed_at)")
+        set_db_version(cursor, 7)
+        print("Migration 7 complete.")
+    
+    # Migration 8: Stored playlist statistics for the channel playlists tab
+    if current_version < 8:
+        print("Applying migration 8: Create playlist_stats table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS playlist_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                playlist_id TEXT UNIQUE,
+                channel_id INTEGER,
+                title TEXT,
+                video_count INTEGER DEFAULT 0,
+                position INTEGER,
+                refreshed_at DATETIME,
+                FOREIGN KEY (channel_id) REFERENCES channels(id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_playlist_stats_channel_id ON playlist_stats (channel_id)")
+        set_db_version(cursor, 8)
+        print("Migration 8 complete.")
+    
+    # Migration 9: Indexes for the channel page, channel list, queue and history queries
+    if current_version < 9:
+        print("Applying migration 9: Add query indexes...")
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS ix_videos_channel_publish ON videos (channel_id, publish_date)",
+            "CREATE INDEX IF NOT EXISTS ix_videos_channel_downloaded_publish ON videos (channel_id, downloaded, publish_date)",
+            "CREATE INDEX IF NOT EXISTS ix_videos_channel_title ON videos (channel_id, title)",
+            "CREATE INDEX IF NOT EXISTS ix_videos_channel_season ON videos (channel_id, season_number)",
+            "CREATE INDEX IF NOT EXISTS ix_videos_status_publish ON videos (download_status, publish_date)",
+            "CREATE INDEX IF NOT EXISTS ix_videos_downloaded_publish ON videos (downloaded, publish_date)",
+            "CREATE INDEX IF NOT EXISTS ix_queue_status ON queue (status, id)",
+            "CREATE INDEX IF NOT EXISTS ix_queue_video_id ON queue (video_id)",
+        ]
+        for statement in indexes:
+            try:
+                cursor.execute(statement)
+            except sqlite3.OperationalError as e:
+                print(f"Skipping index: {e}")
+        set_db_version(cursor, 9)
+        print("Migration 9 complete.")
+    
+    # Migration 10: Denormalized library counters (filled by the app on first start)
+    if current_version < 10:
+        print("Applying migration 10: Create channel_stats table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS channel_stats (
+                channel_id INTEGER PRIMARY KEY,
+                total INTEGER DEFAULT 0,
+                discovered INTEGER DEFAULT 0,
+                downloaded INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                bytes INTEGER DEFAULT 0,
+                updated_at DATETIME
+            )
+        """)
+        set_db_version(cursor, 10)
+        print("Migration 10 complete.")
+    
+    # Migration 11: Counter for the channel page's downloaded filter
+    if current_version < 11:
+        print("Applying migration 11: Add channel_stats.discovered_downloaded...")
+        try:
+            cursor.execute("ALTER TABLE channel_stats ADD COLUMN discovered_downloaded INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+        cursor.execute("""
+            UPDATE channel_stats SET discovered_downloaded = (
+                SELECT COUNT(*) FROM videos
+                WHERE videos.duration IS NOT NULL AND videos.downloaded = 1
+                AND (channel_stats.channel_id = 0 OR videos.channel_id = channel_stats.channel_id)
+            )
+        """)
+        set_db_version(cursor, 11)
+        print("Migration 11 complete.")
+    
+    # Migration 12: Episode number sequences (seeded from existing numbering)
+    if current_version < 12:
+        print("Applying migration 12: Create episode_sequences table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS episode_sequences (
+                channel_id INTEGER NOT NULL,
+                season_number INTEGER NOT NULL,
+                last_episode INTEGER DEFAULT 0,
+                PRIMARY KEY (channel_id, season_number)
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO episode_sequences (channel_id, season_number, last_episode)
+            SELECT channel_id, season_number, COALESCE(MAX(episode_number), 0) FROM videos
+            WHERE channel_id IS NOT NULL AND season_number IS NOT NULL
+            GROUP BY channel_id, season_number
+        """)
+        set_db_version(cursor, 12)
+        print("Migration 12 complete.")
+    
+    # Migration 13: Proxied image cache index (bodies live under CONFIG_PATH/images)
+    if current_version < 13:
+        print("Applying migration 13: Create image_cache table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                content_hash TEXT,
+                content_type TEXT,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at DATETIME,
+                accessed_at DATETIME
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_image_cache_content_hash ON image_cache (content_hash)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_image_cache_accessed_at ON image_cache (accessed_at)")
+        set_db_version(cursor, 13)
+        print("Migration 13 complete.")
+    
+    # Migration 14: Newest feed entry seen, so feed-only uploads (Shorts, streams) are not rechecked
+    if current_version < 14:
+        print("Applying migration 14: Add channels.feed_video_id...")
+        try:
+            cursor.execute("ALTER TABLE channels ADD COLUMN feed_video_id TEXT")
+        except sqlite3.OperationalError:
+            pass
+        set_db_version(cursor, 14)
+        print("Migration 14 complete.")
+    
+    # Migration 15: Real upload times (from the feed and yt-dlp) for sync cadence
+    if current_version < 15:
+        print("Applying migration 15: Add videos.uploaded_at...")
+        try:
+            cursor.execute("ALTER TABLE videos ADD COLUMN uploaded_at DATETIME")
+        except sqlite3.OperationalError:
+            pass
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_videos_channel_uploaded ON videos (channel_id, uploaded_at)")
+        set_db_version(cursor, 15)
+        print("Migration 15 complete.")
+    
+    # Migration 16: Per-channel playlist refresh marker (tells "no playlists" from "never refreshed")
+    if current_version < 16:
+        print("Applying migration 16: Add channels.playlists_refreshed_at...")
+        try:
+            cursor.execute("ALTER TABLE channels ADD COLUMN playlists_refreshed_at DATETIME")
+        except sqlite3.OperationalError:
+            pass
+        cursor.execute("""
+            UPDATE channels SET playlists_refreshed_at = (
+                SELECT MIN(refreshed_at) FROM playlist_stats WHERE playlist_stats.channel_id = channels.id
+            )
+        """)
+        set_db_version(cursor, 16)
+        print("Migration 16 complete.")
+    
+    # Migration 17: playlists.last_sync marks stored membership; set it where rows already exist
+    if current_version < 17:
+        print("Applying migration 17: Mark playlists with stored membership as synced...")
+        cursor.execute("""
+            UPDATE playlists SET last_sync = datetime('now')
+            WHERE last_sync IS NULL
+              AND EXISTS (SELECT 1 FROM playlist_videos WHERE playlist_videos.playlist_id = playlists.playlist_id)
+        """)
+        set_db_version(cursor, 17)
+        print("Migration 17 complete.")
+    
     conn.commit()
     conn.close()
-    print(f"Database migrations complete. Current version: {max(current_version, 2)}")
+    print(f"Database migrations complete. Current version: {max(current_version, 17)}")
 
 if __name__ == "__main__":
     try:
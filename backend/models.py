@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -19,6 +19,11 @@ class Channel(Base):
     quality = Column(String, default='1080p')
     added = Column(DateTime, default=datetime.utcnow)
     last_sync = Column(DateTime)
+    last_video_id = Column(String)  # Newest upload seen by the last sync (high-water mark)
+    feed_etag = Column(String)
+    feed_modified = Column(String)
+    feed_video_id = Column(String)  # Newest entry of the last feed poll, Shorts and streams included
+    playlists_refreshed_at = Column(DateTime)  # Last playlist_stats refresh, also set when there are no playlists
     tags = Column(String, default='[]')
     
     videos = relationship('Video', back_populates='channel')
@@ -39,14 +44,46 @@ class Playlist(Base):
     
     channel = relationship('Channel')
 
+class PlaylistStats(Base):
+    __tablename__ = 'playlist_stats'
+    
+    id = Column(Integer, primary_key=True)
+    playlist_id = Column(String, unique=True)
+    channel_id = Column(Integer, ForeignKey('channels.id'), index=True)
+    title = Column(String)
+    video_count = Column(Integer, default=0)
+    position = Column(Integer)
+    refreshed_at = Column(DateTime)
+
+class PlaylistVideo(Base):
+    __tablename__ = 'playlist_videos'
+    __table_args__ = (UniqueConstraint('playlist_id', 'video_id'),)
+    
+    id = Column(Integer, primary_key=True)
+    playlist_id = Column(String, index=True)
+    video_id = Column(String, index=True)
+    position = Column(Integer)
+
 class Video(Base):
     __tablename__ = 'videos'
+    # Chosen from the channel page, channel list, queue and history queries;
+    # backend/check_indexes.py fails if any of them falls back to a table scan
+    __table_args__ = (
+        Index('ix_videos_channel_publish', 'channel_id', 'publish_date'),
+        Index('ix_videos_channel_downloaded_publish', 'channel_id', 'downloaded', 'publish_date'),
+        Index('ix_videos_channel_title', 'channel_id', 'title'),
+        Index('ix_videos_channel_season', 'channel_id', 'season_number'),
+        Index('ix_videos_status_publish', 'download_status', 'publish_date'),
+        Index('ix_videos_downloaded_publish', 'downloaded', 'publish_date'),
+        Index('ix_videos_channel_uploaded', 'channel_id', 'uploaded_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     video_id = Column(String, unique=True)
     channel_id = Column(Integer, ForeignKey('channels.id'))
     title = Column(String)
     publish_date = Column(DateTime)
+    uploaded_at = Column(DateTime)  # Upload time on YouTube (UTC) when known; publish_date is when it was found
     downloaded = Column(Boolean, default=False)
     download_path = Column(String)
     file_size = Column(Integer)
@@ -58,14 +95,40 @@ class Video(Base):
     
     channel = relationship('Channel', back_populates='videos')
 
+class ChannelStats(Base):
+    __tablename__ = 'channel_stats'
+    
+    channel_id = Column(Integer, primary_key=True)  # 0 = whole library
+    total = Column(Integer, default=0)
+    discovered = Column(Integer, default=0)  # Found by monitoring (has duration)
+    downloaded = Column(Integer, default=0)
+    discovered_downloaded = Column(Integer, default=0)  # Downloaded videos among the discovered ones
+    failed = Column(Integer, default=0)
+    bytes = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class EpisodeSequence(Base):
+    __tablename__ = 'episode_sequences'
+    
+    channel_id = Column(Integer, primary_key=True)
+    season_number = Column(Integer, primary_key=True)
+    last_episode = Column(Integer, default=0)  # Highest episode number handed out
+
 class DownloadQueue(Base):
     __tablename__ = 'queue'
+    __table_args__ = (
+        Index('ix_queue_status', 'status', 'id'),
+        Index('ix_queue_video_id', 'video_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     video_id = Column(Integer, ForeignKey('videos.id'))
     status = Column(String, default='queued')
     progress = Column(Integer, default=0)
     added = Column(DateTime, default=datetime.utcnow)
+    started = Column(DateTime)
+    finished = Column(DateTime)
+    error = Column(String)
 
 class History(Base):
     __tablename__ = 'history'
@@ -75,3 +138,28 @@ class History(Base):
     event_type = Column(String)
     date = Column(DateTime, default=datetime.utcnow)
     data = Column(String)
+
+class MetadataCache(Base):
+    __tablename__ = 'metadata_cache'
+    
+    key = Column(String, primary_key=True)
+    kind = Column(String)
+    url = Column(String)
+    data = Column(Text)
+    size = Column(Integer)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+    accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class CachedImage(Base):
+    __tablename__ = 'image_cache'
+    
+    key = Column(String, primary_key=True)  # sha1 of the upstream URL
+    url = Column(String)
+    content_hash = Column(String, index=True)  # sha256 of the body; names the file on disk
+    content_type = Column(String)
+    size = Column(Integer)
+    etag = Column(String)
+    last_modified = Column(String)
+    fetched_at = Column(DateTime, default=datetime.utcnow)  # Last time upstream confirmed the body
+    accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,45 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend.models import Video, Channel, DownloadQueue
+from backend.services.download_queue import DownloadWorkerPool
+
+class ActivityView:
+    """
+    Read model for the Activity page's queue and history lists.
+
+    Each list is one query that joins the channel name (and, for the queue, the
+    progress of the active queue row) onto the video columns, so a poll costs
+    a single round-trip however many rows it returns.
+    """
+    QUEUE_STATUSES = ('pending', 'queued', 'downloading', 'processing')
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def queue_query(self, status=None, channel_id=None, limit=50):
+        progress = select(DownloadQueue.progress).where(
+            DownloadQueue.video_id == Video.id,
+            DownloadQueue.status.in_(DownloadWorkerPool.ACTIVE_STATUSES)
+        ).order_by(DownloadQueue.id.desc()).limit(1).scalar_subquery()
+        query = self.db.query(
+            Video.id, Video.video_id, Video.title, Video.channel_id, Video.publish_date, Video.download_status,
+            Channel.channel_name, progress.label('progress')
+        ).join(Channel, Channel.id == Video.channel_id)
+        query = query.filter(Video.download_status.in_([status] if status else self.QUEUE_STATUSES))
+        if channel_id is not None:
+            query = query.filter(Video.channel_id == channel_id)
+        return query.order_by(Video.publish_date.desc()).limit(limit)
+
+    def history_query(self, channel_id=None, limit=50):
+        query = self.db.query(
+            Video.id, Video.video_id, Video.title, Video.publish_date, Channel.channel_name
+        ).outerjoin(Channel, Channel.id == Video.channel_id).filter(Video.downloaded == True)
+        if channel_id is not None:
+            query = query.filter(Video.channel_id == channel_id)
+        return query.order_by(Video.publish_date.desc()).limit(limit)
+
+    def queue(self, status=None, channel_id=None, limit=50):
+        return [dict(row._mapping) for row in self.queue_query(status, channel_id, limit)]
+
+    def history(self, channel_id=None, limit=50):
+        return [dict(row._mapping) for row in self.history_query(channel_id, limit)]
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the original image is served
+    Image = None
+
+class LocalArtwork:
+    """
+    Finds the artwork Downloader writes next to each episode (<episode>.jpg) and,
+    when Pillow is installed, keeps downscaled copies for grid views in cache_dir.
+    Variants are keyed by source path and width and carry the source's mtime, so
+    replacing the source image (a re-download) regenerates the variant in place
+    instead of leaving the old one behind.
+    """
+    SIDECAR_SUFFIXES = ('.jpg', '-thumb.jpg', '.webp', '.png')
+    WIDTHS = (160, 320, 480, 640)
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+
+    def find(self, video_path):
+        """Return the sidecar image for a downloaded video file, or None"""
+        if not video_path:
+            return None
+        base = os.path.splitext(video_path)[0]
+        for suffix in self.SIDECAR_SUFFIXES:
+            if os.path.isfile(base + suffix):
+                return base + suffix
+        return None
+
+    def variant(self, path, width):
+        """Return path downscaled to the nearest supported width (path itself if that is not possible)"""
+        if Image is None or not width:
+            return path
+        width = next((w for w in self.WIDTHS if w >= width), self.WIDTHS[-1])
+        stat = os.stat(path)
+        key = hashlib.sha1(f"{path}:{width}".encode('utf-8')).hexdigest()
+        target = os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+        if self._is_current(target, stat):
+            return target
+
+        with self._lock:
+            if self._is_current(target, stat):
+                return target
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                with Image.open(path) as image:
+                    if image.width <= width:
+                        return path
+                    image.thumbnail((width, width * image.height // image.width))
+                    tmp_path = f"{target}.tmp"
+                    image.convert('RGB').save(tmp_path, 'JPEG', quality=85)
+                    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                    os.replace(tmp_path, target)
+            except Exception as e:
+                print(f"Failed to resize artwork {path}: {e}")
+                return path
+        return target
+
+    def _is_current(self, target, source_stat):
+        try:
+            return os.stat(target).st_mtime_ns == source_stat.st_mtime_ns
+        except OSError:
+            return False
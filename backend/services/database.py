@@ -0,0 +1,105 @@
+import queue
+import threading
+from sqlalchemy import create_engine, event
+
+def create_sqlite_engine(db_path, journal_mode='WAL', busy_timeout=30):
+    """
+    Engine for the Tubarr database, tuned for many threads sharing one SQLite file.
+
+    WAL lets readers (API requests) proceed while a writer commits, synchronous=NORMAL
+    is durable under WAL except for power loss, and busy_timeout makes writers wait
+    for the lock instead of failing with 'database is locked'.
+    """
+    engine = create_engine(
+        f'sqlite:///{db_path}',
+        connect_args={'timeout': busy_timeout, 'check_same_thread': False}
+    )
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if journal_mode:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        cursor.close()
+
+    return engine
+
+class WriteQueue:
+    """
+    Single writer thread for small, frequent writes (progress updates, status flips,
+    access timestamps). Submitted statements are applied in order, and everything
+    queued within max_delay seconds is committed in one transaction.
+    """
+    def __init__(self, engine, max_batch=200, max_delay=0.25):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0
+        self.statements = 0
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def submit(self, statement, params=None):
+        """Queue a Core statement; it is executed asynchronously by the writer thread"""
+        self._queue.put((statement, params))
+
+    def flush(self, timeout=5):
+        """Block until everything submitted so far has been committed"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            try:
+                while len(batch) < self.max_batch:
+                    item = self._queue.get(timeout=self.max_delay)
+                    if item is None:
+                        self._write(batch)
+                        return
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            self._write(batch)
+
+    def _write(self, batch):
+        statements = [item for item in batch if not isinstance(item, threading.Event)]
+        if statements:
+            try:
+                with self.engine.begin() as conn:
+                    for statement, params in statements:
+                        conn.execute(statement, params or {})
+            except Exception as e:
+                # Retry one by one so a single bad statement doesn't drop the whole batch
+                print(f"Batched write failed, retrying individually: {e}")
+                for statement, params in statements:
+                    try:
+                        with self.engine.begin() as conn:
+                            conn.execute(statement, params or {})
+                    except Exception as e:
+                        print(f"Write failed: {e}")
+            self.batches += 1
+            self.statements += len(statements)
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
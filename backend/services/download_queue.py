@@ -0,0 +1,224 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import update, func, or_
+from backend.models import DownloadQueue, Video
+
+class DownloadWorkerPool:
+    """
+    Fixed-size pool of download workers fed from the `queue` table.
+
+    Rows are claimed with a conditional UPDATE so two workers never pick up
+    the same item, and they stay in the table until they finish, so anything
+    queued or interrupted mid-download is picked up again after a restart.
+    Only the claim is written synchronously; later status changes and
+    progress are batched through write_queue when one is given.
+    Videos that belong to a playlist are additionally capped at
+    playlist_concurrency downloads in flight per playlist (by default one
+    less than the number of workers), so one large backfill cannot occupy
+    every worker; items behind a capped playlist are claimed in its place.
+
+    Downloads run in two stages. When handler returns a callable, the item
+    moves to 'processing' and the callable (stream merging, metadata embedding,
+    sidecars) runs on a separate pool of postprocess_workers threads, so the
+    download worker can start on the next item. At most twice that many
+    downloads wait for post-processing; past that, download workers hold off.
+    """
+    ACTIVE_STATUSES = ('queued', 'downloading', 'processing')
+
+    def __init__(self, session_factory, handler, workers=3, playlist_concurrency=None, poll_interval=5, write_queue=None, postprocess_workers=2):
+        self.session_factory = session_factory
+        self.write_queue = write_queue
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.playlist_concurrency = max(1, int(playlist_concurrency or self.workers - 1))
+        self.poll_interval = poll_interval
+        self.postprocess_workers = max(1, int(postprocess_workers))
+        self._postprocess = ThreadPoolExecutor(max_workers=self.postprocess_workers, thread_name_prefix='postprocess')
+        self._handoff_slots = threading.BoundedSemaphore(self.postprocess_workers * 2)
+        self._claim_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._recover()
+        self._stopped.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'download-worker-{i + 1}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Download pool started with {self.workers} workers and {self.postprocess_workers} post-processing workers")
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self._postprocess.shutdown(wait=False, cancel_futures=True)
+
+    def enqueue(self, db, video):
+        """Queue a Video row for download, reusing an active queue item if there is one"""
+        item = db.query(DownloadQueue).filter(
+            DownloadQueue.video_id == video.id,
+            DownloadQueue.status.in_(self.ACTIVE_STATUSES)
+        ).first()
+        if not item:
+            item = DownloadQueue(video_id=video.id, status='queued', progress=0)
+            db.add(item)
+        video.download_status = 'queued'
+        db.commit()
+        self._wakeup.set()
+        return item
+
+    def enqueue_many(self, db, videos):
+        """Queue several Video rows in one transaction, preserving their order"""
+        videos = list(videos)
+        active = {row[0] for row in db.query(DownloadQueue.video_id).filter(
+            DownloadQueue.video_id.in_([video.id for video in videos]),
+            DownloadQueue.status.in_(self.ACTIVE_STATUSES)
+        )}
+        for video in videos:
+            if video.id not in active:
+                db.add(DownloadQueue(video_id=video.id, status='queued', progress=0))
+                active.add(video.id)
+            video.download_status = 'queued'
+        db.commit()
+        self._wakeup.set()
+        return len(videos)
+
+    def _recover(self):
+        """Requeue work that was in flight when the process last stopped"""
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                update(DownloadQueue)
+                .where(DownloadQueue.status.in_(('downloading', 'processing')))
+                .values(status='queued', progress=0, started=None)
+            )
+            db.query(DownloadQueue).filter_by(status='completed').delete()
+            db.commit()
+            if result.rowcount:
+                print(f"Requeued {result.rowcount} interrupted downloads")
+        finally:
+            db.close()
+
+    def _claim(self):
+        with self._claim_lock:
+            db = self.session_factory()
+            try:
+                in_flight = dict(
+                    db.query(Video.playlist_id, func.count(DownloadQueue.id))
+                    .join(Video, Video.id == DownloadQueue.video_id)
+                    .filter(DownloadQueue.status == 'downloading', Video.playlist_id.isnot(None))
+                    .group_by(Video.playlist_id)
+                    .all()
+                )
+                capped = [playlist_id for playlist_id, count in in_flight.items() if count >= self.playlist_concurrency]
+                for candidate in self.claim_query(db, capped).limit(10):
+                    result = db.execute(
+                        update(DownloadQueue)
+                        .where(DownloadQueue.id == candidate.id, DownloadQueue.status == 'queued')
+                        .values(status='downloading', started=datetime.utcnow(), progress=0)
+                    )
+                    db.commit()
+                    if result.rowcount == 1:
+                        return candidate.id
+                return None
+            finally:
+                db.close()
+
+    @staticmethod
+    def claim_query(db, capped_playlists=()):
+        """Queued items in order, skipping playlists that are at their concurrency cap"""
+        query = (
+            db.query(DownloadQueue.id)
+            .outerjoin(Video, Video.id == DownloadQueue.video_id)
+            .filter(DownloadQueue.status == 'queued')
+        )
+        if capped_playlists:
+            query = query.filter(or_(Video.playlist_id.is_(None), Video.playlist_id.notin_(capped_playlists)))
+        return query.order_by(DownloadQueue.id)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                item_id = self._claim()
+            except Exception as e:
+                print(f"Download worker failed to claim work: {e}")
+                item_id = None
+            if item_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._process(item_id)
+
+    def _process(self, item_id):
+        db = self.session_factory()
+        try:
+            video_id = db.get(DownloadQueue, item_id).video_id
+        finally:
+            db.close()
+        try:
+            postprocess = self.handler(video_id, self._progress_reporter(item_id))
+        except Exception as e:
+            self._finish(item_id, e)
+            return
+        if not callable(postprocess):
+            self._finish(item_id)
+            return
+        # Wait for room in the post-processing backlog, then free this worker
+        self._handoff_slots.acquire()
+        self._write(update(DownloadQueue).where(DownloadQueue.id == item_id).values(status='processing'))
+        self._postprocess.submit(self._run_postprocess, item_id, postprocess)
+
+    def _run_postprocess(self, item_id, postprocess):
+        try:
+            postprocess()
+        except Exception as e:
+            self._finish(item_id, e)
+        else:
+            self._finish(item_id)
+        finally:
+            self._handoff_slots.release()
+
+    def _finish(self, item_id, error=None):
+        if error is None:
+            values = {'status': 'completed', 'progress': 100, 'error': None}
+        else:
+            values = {'status': 'failed', 'error': str(error)}
+            print(f"Queued download {item_id} failed: {error}")
+            traceback.print_exc()
+        # Submitted after the item's progress updates, so the final state always lands last
+        self._write(update(DownloadQueue).where(DownloadQueue.id == item_id).values(finished=datetime.utcnow(), **values))
+
+    def _write(self, statement):
+        """Apply a progress or status update through the write queue (directly when there is none)"""
+        if self.write_queue:
+            self.write_queue.submit(statement)
+            return
+        db = self.session_factory()
+        try:
+            db.execute(statement)
+            db.commit()
+        except Exception as e:
+            print(f"Failed to update download queue: {e}")
+        finally:
+            db.close()
+
+    def _progress_reporter(self, item_id):
+        """Build a callback that records percent complete in steps of 5% (and any step back)"""
+        last = {'progress': -1}
+
+        def report(progress):
+            progress = int(progress)
+            if 0 <= progress - last['progress'] < 5 and progress < 100:
+                return
+            last['progress'] = progress
+            self._write(update(DownloadQueue).where(DownloadQueue.id == item_id).values(progress=progress))
+
+        return report
@@ -1,7 +1,8 @@
-import yt_dlp
 import os
 import json
 from datetime import datetime
+from backend.services.http_client import http_client
+from backend.services.ydl_pool import ydl_pool
 
 class Downloader:
     QUALITY_MAP = {
@@ -12,43 +13,66 @@ class Downloader:
         'best': 'bestvideo+bestaudio/best'
     }
     
+    # Run on the downloaded file by postprocess(), after the merge and fixups
+    # that yt-dlp queued during the network download
+    POSTPROCESS_OPTS = {
+        'quiet': True,
+        'postprocessors': [
+            {'key': 'FFmpegMetadata'},
+            {'key': 'EmbedThumbnail'}
+        ]
+    }
+    
+    def __init__(self, metadata_cache=None):
+        self.metadata_cache = metadata_cache
+    
     def get_channel_info(self, channel_url):
         ydl_opts = {'quiet': True, 'extract_flat': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(channel_url, download=False)
-            thumbnail = None
-            if info.get('thumbnails'):
-                thumbnail = info['thumbnails'][-1].get('url')
-            return {
-                'channel_id': info.get('channel_id'),
-                'channel_name': info.get('channel'),
-                'url': info.get('channel_url'),
-                'thumbnail': thumbnail
-            }
+        if self.metadata_cache:
+            info = self.metadata_cache.extract(channel_url, ydl_opts, 'channel')
+        else:
+            with ydl_pool.checkout(ydl_opts) as ydl:
+                info = ydl.extract_info(channel_url, download=False)
+        thumbnail = None
+        if info.get('thumbnails'):
+            thumbnail = info['thumbnails'][-1].get('url')
+        return {
+            'channel_id': info.get('channel_id'),
+            'channel_name': info.get('channel'),
+            'url': info.get('channel_url'),
+            'thumbnail': thumbnail,
+            'description': info.get('description')
+        }
+    
+    def download_video(self, video_id, channel_name, download_path, quality='1080p', season_number=1, episode_number=None, naming_format='standard', custom_pattern=None, season_name=None, channel_thumbnail=None, progress_hook=None, info=None):
+        """Download and post-process a video in one call; returns the final filename"""
+        return self.postprocess(self.download_media(
+            video_id, channel_name, download_path, quality, season_number, episode_number,
+            naming_format, custom_pattern, season_name, channel_thumbnail, progress_hook, info
+        ))
     
-    def download_video(self, video_id, channel_name, download_path, quality='1080p', season_number=1, episode_number=None, naming_format='standard', custom_pattern=None, season_name=None, channel_thumbnail=None):
+    def download_media(self, video_id, channel_name, download_path, quality='1080p', season_number=1, episode_number=None, naming_format='standard', custom_pattern=None, season_name=None, channel_thumbnail=None, progress_hook=None, info=None):
         """
+        Network stage of download_video: fetch the streams only. yt-dlp's own
+        post-processing (merging video and audio, fixups) is captured rather
+        than run; the returned download is passed to postprocess(), which runs
+        it, embeds metadata and writes the sidecars.
+        
         Download with TV show structure:
         /downloads/Channel Name/Season 01/Channel Name - S01E01 - Video Title.mkv
         Season 00 = Specials (individual videos not in playlists)
         season_name = Optional custom season folder name (e.g., playlist title)
+        progress_hook = Optional callback receiving download progress as a percentage
+        info = Optional result of extract_info(url, download=False, process=False) to download
+               from instead of extracting the video page again
         """
         safe_channel = self._sanitize(channel_name)
-        channel_dir = os.path.join(download_path, safe_channel)
+        channel_dir = self.get_channel_dir(download_path, channel_name)
         
         # Create show NFO if it doesn't exist
         self._create_show_nfo(channel_dir, channel_name, channel_thumbnail)
         
-        # Season 00 = Specials folder
-        if season_number == 0:
-            season_dir = os.path.join(channel_dir, "Specials")
-        elif season_name:
-            # Use custom season name (e.g., playlist title)
-            safe_season_name = self._sanitize(season_name)
-            season_dir = os.path.join(channel_dir, f"Season {season_number:02d} - {safe_season_name}")
-        else:
-            season_dir = os.path.join(channel_dir, f"Season {season_number:02d}")
-        
+        season_dir = self.get_season_dir(download_path, channel_name, season_number, season_name)
         os.makedirs(season_dir, exist_ok=True)
         
         # Create season NFO
@@ -85,30 +109,112 @@ class Downloader:
             'merge_output_format': 'mkv',
             'writethumbnail': True,
             'writeinfojson': True,
-            'writedescription': True,
-            'postprocessors': [
-                {'key': 'FFmpegMetadata'},
-                {'key': 'EmbedThumbnail'}
-            ]
+            'writedescription': True
         }
+        if progress_hook:
+            ydl_opts['progress_hooks'] = [self._progress_adapter(progress_hook)]
         
         url = f'https://www.youtube.com/watch?v={video_id}'
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info)
-            
-            # Create NFO file for media servers
-            self._create_nfo(info, season_dir, safe_channel, season_number, episode_number or 1)
-            
-            # Download episode thumbnail for media servers
-            # Media servers look for: filename.jpg (same as video but .jpg extension)
-            if info.get('thumbnail'):
-                # Get the base filename without extension
-                base_filename = os.path.splitext(filename)[0]
-                thumb_path = f"{base_filename}.jpg"
-                self._download_image(info['thumbnail'], thumb_path)
-            
-            return filename
+        pending = {}
+
+        def defer_post_process(filename, info, files_to_move=None):
+            # Stands in for YoutubeDL.post_process, which process_info calls with
+            # the merger and fixups queued on info['__postprocessors']
+            info['filepath'] = filename
+            pending.update(filename=filename, info=info, files_to_move=files_to_move or {})
+            return info
+
+        with ydl_pool.checkout(ydl_opts) as ydl:
+            ydl.post_process = defer_post_process
+            try:
+                if info:
+                    # Format selection and the download run on the caller's extraction
+                    info = ydl.process_ie_result(info, download=True)
+                else:
+                    info = ydl.extract_info(url, download=True)
+            finally:
+                del ydl.post_process
+            if not pending:
+                raise ValueError(f"yt-dlp did not download {video_id}")
+        
+        return {
+            'filename': pending['filename'],
+            'info': pending['info'],
+            'files_to_move': pending['files_to_move'],
+            'season_dir': season_dir,
+            'channel_name': safe_channel,
+            'season_number': season_number,
+            'episode_number': episode_number or 1
+        }
+    
+    def postprocess(self, download):
+        """
+        Disk stage of download_video: merge the streams, embed metadata and the
+        thumbnail into the file, then write the episode NFO and thumbnail sidecar.
+        Returns the final filename.
+        """
+        with ydl_pool.checkout(self.POSTPROCESS_OPTS) as ydl:
+            # The merger and fixups were built by the download stage's instance,
+            # which may already be serving another download
+            for pp in download['info'].get('__postprocessors') or []:
+                pp.set_downloader(ydl)
+            info = ydl.post_process(download['filename'], download['info'], download['files_to_move'])
+        filename = info.get('filepath') or download['filename']
+        
+        # Create NFO file for media servers
+        self._create_nfo(info, download['season_dir'], download['channel_name'], download['season_number'], download['episode_number'])
+        
+        # Download episode thumbnail for media servers
+        # Media servers look for: filename.jpg (same as video but .jpg extension)
+        if info.get('thumbnail'):
+            # Get the base filename without extension
+            base_filename = os.path.splitext(filename)[0]
+            thumb_path = f"{base_filename}.jpg"
+            self._download_image(info['thumbnail'], thumb_path)
+        
+        return filename
+    
+    def _progress_adapter(self, progress_hook):
+        """
+        Convert yt-dlp progress dicts into a percentage for progress_hook.
+        Separately downloaded video and audio streams are summed by bytes, so
+        the second stream carries the bar on instead of restarting it at 0.
+        """
+        streams = {}
+
+        def hook(d):
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            if d.get('status') == 'downloading' and total:
+                streams[d.get('filename')] = (d.get('downloaded_bytes') or 0, total)
+            elif d.get('status') == 'finished':
+                size = total or d.get('downloaded_bytes') or 0
+                streams[d.get('filename')] = (size, size)
+            else:
+                return
+            expected = sum(size for _, size in streams.values())
+            if not expected:
+                progress_hook(99)
+                return
+            done = sum(downloaded for downloaded, _ in streams.values())
+            progress_hook(min(99, done * 100 // expected))
+        return hook
+    
+    def get_channel_dir(self, download_path, channel_name):
+        """Resolve the show folder holding tvshow.nfo, poster.jpg and the seasons"""
+        return os.path.join(download_path, self._sanitize(channel_name))
+    
+    def get_season_dir(self, download_path, channel_name, season_number, season_name=None):
+        """Resolve the season folder a video will be written to"""
+        channel_dir = self.get_channel_dir(download_path, channel_name)
+        
+        # Season 00 = Specials folder
+        if season_number == 0:
+            return os.path.join(channel_dir, "Specials")
+        if season_name:
+            # Use custom season name (e.g., playlist title)
+            safe_season_name = self._sanitize(season_name)
+            return os.path.join(channel_dir, f"Season {season_number:02d} - {safe_season_name}")
+        return os.path.join(channel_dir, f"Season {season_number:02d}")
     
     def _create_nfo(self, info, season_dir, channel_name, season_num, episode_num):
         """Create NFO file compatible with Jellyfin/Plex/Emby"""
@@ -194,8 +300,7 @@ class Downloader:
             return
         
         try:
-            import requests
-            response = requests.get(url, timeout=10)
+            response = http_client.get(url)
             if response.status_code == 200:
                 with open(path, 'wb') as f:
                     f.write(response.content)
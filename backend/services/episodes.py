@@ -0,0 +1,39 @@
+from sqlalchemy import select, func
+from sqlalchemy.dialects.sqlite import insert
+from backend.models import EpisodeSequence, Video
+
+class EpisodeAllocator:
+    """
+    Hands out episode numbers from a per-(channel, season) sequence in episode_sequences.
+
+    Each allocation is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING,
+    so it is atomic under SQLite's write lock and two concurrent downloads can
+    never get the same number. A sequence that does not exist yet starts after
+    the highest episode number already stored for that season. Like the other
+    services this runs in the caller's transaction; nothing is committed here.
+    """
+    @staticmethod
+    def allocate(db, channel_id, season_number):
+        """Return the next episode number for the season"""
+        return EpisodeAllocator.reserve(db, channel_id, season_number, 1)[0]
+
+    @staticmethod
+    def reserve(db, channel_id, season_number, count):
+        """Reserve count consecutive episode numbers in one statement; returns them as a range"""
+        if count <= 0:
+            return range(0)
+        highest = select(func.coalesce(func.max(Video.episode_number), 0)).where(
+            Video.channel_id == channel_id,
+            Video.season_number == season_number
+        ).scalar_subquery()
+        stmt = insert(EpisodeSequence).values(
+            channel_id=channel_id,
+            season_number=season_number,
+            last_episode=highest + count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['channel_id', 'season_number'],
+            set_={'last_episode': EpisodeSequence.last_episode + count}
+        ).returning(EpisodeSequence.last_episode)
+        last = db.execute(stmt).scalar_one()
+        return range(last - count + 1, last + 1)
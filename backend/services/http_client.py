@@ -0,0 +1,61 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class HttpClient:
+    """
+    Shared keep-alive HTTP client for images and feeds.
+
+    One requests.Session with a pooled adapter, so repeat requests to i.ytimg.com
+    and youtube.com reuse open TLS connections instead of handshaking every time.
+    At most max_connections requests are in flight; further callers wait for a
+    slot. Streamed responses hold their slot until close() is called.
+    """
+    def __init__(self, max_connections=16, timeout=10, retries=2):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Tubarr'
+        adapter = HTTPAdapter(
+            pool_connections=8,  # Distinct hosts kept warm
+            pool_maxsize=max_connections,
+            max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504), allowed_methods=('GET', 'HEAD'))
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._streaming = set()
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """GET with the body read in full"""
+        kwargs.setdefault('timeout', self.timeout)
+        with self._slots:
+            return self.session.get(url, **kwargs)
+
+    def open(self, url, **kwargs):
+        """GET that leaves the body unread for iter_content(); always pair with close()"""
+        kwargs.setdefault('timeout', self.timeout)
+        self._slots.acquire()
+        try:
+            response = self.session.get(url, stream=True, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._streaming.add(id(response))
+        return response
+
+    def close(self, response):
+        """Return a streamed response's connection to the pool and free its slot (idempotent)"""
+        with self._lock:
+            if id(response) not in self._streaming:
+                return
+            self._streaming.discard(id(response))
+        try:
+            response.close()
+        finally:
+            self._slots.release()
+
+http_client = HttpClient(max_connections=int(os.getenv('TUBARR_HTTP_CONNECTIONS', 16)))
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from sqlalchemy import func, update
+from backend.models import CachedImage
+from backend.services.http_client import http_client
+from backend.services.singleflight import SingleFlight
+
+class ImageCache:
+    """
+    On-disk cache for images served through /api/v1/proxy/image.
+
+    Bodies are stored once per sha256 of their content under root (so identical
+    placeholder thumbnails share a file) and indexed by URL in image_cache.
+    Entries younger than max_age are served without contacting upstream; older
+    ones are revalidated with If-None-Match / If-Modified-Since. Once the cache
+    grows past max_bytes the least recently used entries are evicted (never the
+    one just stored). Bodies larger than max_object_bytes are refused.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, session_factory, root, max_bytes=512 * 1024 * 1024, max_age=timedelta(days=7), write_queue=None, prefetch_workers=2, max_object_bytes=5 * 1024 * 1024):
+        self.session_factory = session_factory
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.max_age = max_age
+        self.write_queue = write_queue
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evictions': 0, 'prefetched': 0, 'rejected': 0}
+        self._inflight = SingleFlight()
+        self._prefetch = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='image-prefetch')
+
+    def fetch(self, url):
+        """Return the CachedImage for url, downloading or revalidating it if needed; None if upstream has no image"""
+        key = self._key(url)
+        entry = self._get(key)
+        if entry and entry.fetched_at > datetime.utcnow() - self.max_age:
+            self._count('hits')
+            return entry
+        return self._inflight.do(key, lambda: self._refresh(key, url, entry))
+
+    def path_for(self, entry):
+        return os.path.join(self.root, entry.content_hash[:2], entry.content_hash)
+
+    def prefetch(self, urls):
+        """Warm the cache for urls in the background"""
+        for url in urls:
+            self._prefetch.submit(self._prefetch_one, url)
+
+    def clear(self):
+        db = self.session_factory()
+        try:
+            removed = db.query(CachedImage).delete()
+            db.commit()
+        finally:
+            db.close()
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                try:
+                    os.remove(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        db = self.session_factory()
+        try:
+            entries = db.query(CachedImage).count()
+            size = db.query(func.coalesce(func.sum(CachedImage.size), 0)).scalar()
+        finally:
+            db.close()
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        stats.update({
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None
+        })
+        return stats
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _prefetch_one(self, url):
+        try:
+            if self._get(self._key(url), touch=False) is None:
+                if self.fetch(url):
+                    self._count('prefetched')
+        except Exception as e:
+            print(f"Image prefetch failed for {url}: {e}")
+
+    def _get(self, key, touch=True):
+        db = self.session_factory()
+        try:
+            entry = db.query(CachedImage).filter_by(key=key).first()
+            if not entry:
+                return None
+            if not os.path.exists(self.path_for(entry)):
+                # Body was removed behind our back; treat as a miss
+                db.delete(entry)
+                db.commit()
+                return None
+            if touch:
+                if self.write_queue:
+                    self.write_queue.submit(update(CachedImage).where(CachedImage.key == key).values(accessed_at=datetime.utcnow()))
+                else:
+                    entry.accessed_at = datetime.utcnow()
+                    db.commit()
+                    db.refresh(entry)
+            db.expunge(entry)
+            return entry
+        finally:
+            db.close()
+
+    def _refresh(self, key, url, entry):
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        try:
+            response = http_client.open(url, headers=headers)
+        except requests.RequestException as e:
+            if entry:
+                # Upstream is unreachable; a stale image beats a broken one
+                print(f"Serving stale image for {url}: {e}")
+                return entry
+            raise
+        try:
+            if entry and response.status_code == 304:
+                self._count('revalidated')
+                return self._touch_fetched(key, entry)
+            if response.status_code != 200:
+                return None
+            if int(response.headers.get('content-length') or 0) > self.max_object_bytes:
+                self._count('rejected')
+                return None
+            self._count('misses')
+            return self._store(key, url, response)
+        finally:
+            http_client.close(response)
+
+    def _touch_fetched(self, key, entry):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.query(CachedImage).filter_by(key=key).update({'fetched_at': now, 'accessed_at': now})
+            db.commit()
+        finally:
+            db.close()
+        entry.fetched_at = now
+        return entry
+
+    def _store(self, key, url, response):
+        # Stream into a temp file while hashing, then move it to its content address
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.incoming-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(self.CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    if size > self.max_object_bytes:
+                        # No (or a wrong) Content-Length; stop reading instead of filling the disk
+                        break
+                    f.write(chunk)
+            if size > self.max_object_bytes:
+                os.remove(tmp_path)
+                self._count('rejected')
+                print(f"Not caching {url}: larger than {self.max_object_bytes} bytes")
+                return None
+            content_hash = digest.hexdigest()
+            path = os.path.join(self.root, content_hash[:2], content_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            entry = db.merge(CachedImage(
+                key=key,
+                url=url,
+                content_hash=content_hash,
+                content_type=response.headers.get('content-type', 'image/jpeg'),
+                size=size,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                fetched_at=now,
+                accessed_at=now
+            ))
+            db.commit()
+            db.refresh(entry)
+            db.expunge(entry)
+            self._evict(db, keep=key)
+            return entry
+        finally:
+            db.close()
+
+    def _evict(self, db, keep=None):
+        """Drop least recently used entries (except keep) until under max_bytes, then delete unreferenced bodies"""
+        total = db.query(func.coalesce(func.sum(CachedImage.size), 0)).scalar()
+        if total <= self.max_bytes:
+            return
+        stale = []
+        candidates = db.query(CachedImage.key, CachedImage.content_hash, CachedImage.size)
+        if keep:
+            candidates = candidates.filter(CachedImage.key != keep)
+        for key, content_hash, size in candidates.order_by(CachedImage.accessed_at):
+            if total <= self.max_bytes:
+                break
+            stale.append((key, content_hash))
+            total -= size or 0
+        db.query(CachedImage).filter(CachedImage.key.in_([key for key, _ in stale])).delete(synchronize_session=False)
+        db.commit()
+        hashes = {content_hash for _, content_hash in stale}
+        still_used = {row[0] for row in db.query(CachedImage.content_hash).filter(CachedImage.content_hash.in_(hashes))}
+        for content_hash in hashes - still_used:
+            try:
+                os.remove(os.path.join(self.root, content_hash[:2], content_hash))
+            except OSError:
+                pass
+        self._count('evictions', len(stale))
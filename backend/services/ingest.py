@@ -0,0 +1,75 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from backend.models import Video
+from backend.services.library_stats import LibraryStats
+
+class VideoIngestor:
+    """
+    Batch insert/update of Video rows keyed on the unique video_id.
+
+    Existing IDs are resolved with chunked IN queries and rows are written with
+    SQLite INSERT ... ON CONFLICT, so ingesting a whole channel costs a handful
+    of statements instead of one SELECT per video. Nothing is committed here;
+    callers commit once so each batch lands in a single transaction.
+    """
+    # Stays well under SQLite's bound-parameter limit for every statement
+    CHUNK_SIZE = 500
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def existing_ids(self, video_ids):
+        """Return the subset of video_ids already stored"""
+        existing = set()
+        for chunk in self._chunks(list(set(video_ids))):
+            existing.update(row[0] for row in self.db.query(Video.video_id).filter(Video.video_id.in_(chunk)))
+        return existing
+
+    def load(self, video_ids):
+        """Load Video rows for video_ids, returned in the order given"""
+        video_ids = list(video_ids)
+        by_id = {}
+        for chunk in self._chunks(video_ids):
+            for video in self.db.query(Video).filter(Video.video_id.in_(chunk)):
+                by_id[video.video_id] = video
+        return [by_id[video_id] for video_id in video_ids if video_id in by_id]
+
+    def upsert(self, rows, update=(), fill=(), update_where=None):
+        """
+        Insert rows (dicts of Video columns, all with the same keys) and return the
+        video_ids that were new.
+        update = columns overwritten from the incoming row when the video exists
+        fill = columns only set when the stored value is NULL
+        update_where = optional SQL condition restricting which existing rows are updated
+        """
+        rows = [row for row in rows if row.get('video_id')]
+        if not rows:
+            return set()
+
+        # Duplicates inside one batch would hit the conflict clause against themselves
+        unique = {}
+        for row in rows:
+            unique.setdefault(row['video_id'], row)
+        rows = list(unique.values())
+        new_ids = {row['video_id'] for row in rows} - self.existing_ids(row['video_id'] for row in rows)
+
+        stmt = insert(Video)
+        set_ = {column: stmt.excluded[column] for column in update}
+        set_.update({column: func.coalesce(Video.__table__.c[column], stmt.excluded[column]) for column in fill})
+        if set_:
+            stmt = stmt.on_conflict_do_update(index_elements=['video_id'], set_=set_, where=update_where)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['video_id'])
+
+        for chunk in self._chunks(rows):
+            self.db.execute(stmt, chunk)
+        # Bulk statements bypass the ORM flush hook that maintains the counters
+        LibraryStats.reconcile(self.db, {row.get('channel_id') for row in rows})
+        # Rows were written behind the ORM's back; reload anything already in the session
+        self.db.expire_all()
+        return new_ids
+
+    def _chunks(self, items):
+        for i in range(0, len(items), self.CHUNK_SIZE):
+            yield items[i:i + self.CHUNK_SIZE]
@@ -0,0 +1,115 @@
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class Job:
+    """One unit of background work, readable while it runs and after it finishes"""
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.progress = 0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created = datetime.utcnow()
+        self.started = None
+        self.finished = None
+        self._manager = None
+
+    def update(self, progress=None, message=None):
+        """Report progress (0-100) and/or a status message from inside the job"""
+        if progress is not None:
+            self.progress = max(0, min(100, int(progress)))
+        if message is not None:
+            self.message = message
+        self._manager._notify(self)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+
+class JobManager:
+    """
+    Runs slow work (yt-dlp extraction, channel syncs) on small thread pools so
+    request handlers can return a job id straight away. Kinds in long_kinds
+    (syncs, full enumerations) get their own long_workers pool, so they cannot
+    hold up interactive jobs such as a search.
+
+    Jobs live in memory only; the most recent max_jobs are kept for polling.
+    notify(job) is called on every state or progress change, e.g. to push the
+    job over the WebSocket.
+    """
+    def __init__(self, workers=4, long_workers=2, long_kinds=(), max_jobs=500, notify=None):
+        self.notify = notify
+        self.max_jobs = max_jobs
+        self.long_kinds = set(long_kinds)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='job')
+        self._long_pool = ThreadPoolExecutor(max_workers=max(1, int(long_workers)), thread_name_prefix='long-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, params=None):
+        """Queue fn(job, *args); its return value becomes the job result"""
+        job = Job(kind, params)
+        job._manager = self
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        self._notify(job)
+        pool = self._long_pool if kind in self.long_kinds else self._pool
+        pool.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, status=None, kind=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if (not status or job.status == status) and (not kind or job.kind == kind)]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._long_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, fn, args):
+        job.status = 'running'
+        job.started = datetime.utcnow()
+        self._notify(job)
+        try:
+            job.result = fn(job, *args)
+            job.status = 'completed'
+            job.progress = 100
+        except Exception as e:
+            print(f"Job {job.kind} {job.id} failed: {e}")
+            traceback.print_exc()
+            job.status = 'failed'
+            job.error = getattr(e, 'detail', None) or str(e)
+        job.finished = datetime.utcnow()
+        self._notify(job)
+
+    def _notify(self, job):
+        if not self.notify:
+            return
+        try:
+            self.notify(job)
+        except Exception as e:
+            print(f"Job notification failed: {e}")
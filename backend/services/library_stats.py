@@ -0,0 +1,147 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, func, case, select
+from sqlalchemy.dialects.sqlite import insert
+from backend.models import Video, Channel, ChannelStats
+
+LIBRARY = 0  # channel_stats row holding whole-library totals
+COUNTERS = ('total', 'discovered', 'downloaded', 'discovered_downloaded', 'failed', 'bytes')
+TRACKED_COLUMNS = ('channel_id', 'duration', 'downloaded', 'download_status', 'file_size')
+
+class LibraryStats:
+    """
+    Per-channel and library-wide video counters kept in channel_stats.
+
+    install() hooks the session so every ORM flush that adds, changes or deletes
+    videos applies the matching counter deltas in the same transaction. Bulk
+    writes that bypass the ORM (INSERT ... ON CONFLICT, Query.delete) call
+    reconcile() for the channels they touched; reconcile() with no channels
+    rebuilds everything and fixes any drift.
+    """
+    @staticmethod
+    def install(session_factory):
+        event.listen(session_factory, 'before_flush', LibraryStats._before_flush)
+
+    @staticmethod
+    def get(db, channel_id=LIBRARY):
+        stats = db.query(ChannelStats).filter_by(channel_id=channel_id).first()
+        return {name: getattr(stats, name) or 0 if stats else 0 for name in COUNTERS}
+
+    @staticmethod
+    def reconcile(db, channel_ids=None):
+        """Recount channels from the videos table (all channels and the library total when channel_ids is None)"""
+        if channel_ids is None:
+            counted = LibraryStats._count(db, None)
+            existing_channels = {row[0] for row in db.query(Channel.id)}
+            db.query(ChannelStats).filter(
+                ChannelStats.channel_id != LIBRARY,
+                ChannelStats.channel_id.notin_(existing_channels)
+            ).delete(synchronize_session=False)
+            for channel_id in existing_channels:
+                LibraryStats._store(db, channel_id, counted.get(channel_id, dict.fromkeys(COUNTERS, 0)))
+            library = dict.fromkeys(COUNTERS, 0)
+            for values in counted.values():
+                for name in COUNTERS:
+                    library[name] += values[name]
+            LibraryStats._store(db, LIBRARY, library)
+            return
+
+        channel_ids = {channel_id for channel_id in channel_ids if channel_id is not None}
+        if not channel_ids:
+            return
+        counted = LibraryStats._count(db, channel_ids)
+        library_delta = dict.fromkeys(COUNTERS, 0)
+        for channel_id in channel_ids:
+            old = LibraryStats.get(db, channel_id)
+            new = counted.get(channel_id, dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                library_delta[name] += new[name] - old[name]
+            LibraryStats._store(db, channel_id, new)
+        LibraryStats._apply(db.connection(), {LIBRARY: library_delta})
+
+    @staticmethod
+    def _count(db, channel_ids):
+        query = db.query(
+            Video.channel_id,
+            func.count(Video.id),
+            func.count(Video.duration),
+            func.coalesce(func.sum(case((Video.downloaded == True, 1), else_=0)), 0),
+            func.coalesce(func.sum(case(((Video.downloaded == True) & Video.duration.isnot(None), 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Video.download_status == 'failed', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Video.downloaded == True, func.coalesce(Video.file_size, 0)), else_=0)), 0)
+        ).group_by(Video.channel_id)
+        if channel_ids is not None:
+            query = query.filter(Video.channel_id.in_(channel_ids))
+        return {row[0]: dict(zip(COUNTERS, row[1:])) for row in query}
+
+    @staticmethod
+    def _store(db, channel_id, values):
+        stmt = insert(ChannelStats).values(channel_id=channel_id, updated_at=datetime.utcnow(), **values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=['channel_id'],
+            set_={**values, 'updated_at': stmt.excluded.updated_at}
+        ))
+
+    @staticmethod
+    def _apply(conn, deltas):
+        for channel_id, delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            stmt = insert(ChannelStats).values(channel_id=channel_id, updated_at=datetime.utcnow(), **delta)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=['channel_id'],
+                set_={
+                    **{name: func.coalesce(ChannelStats.__table__.c[name], 0) + stmt.excluded[name] for name in COUNTERS},
+                    'updated_at': stmt.excluded.updated_at
+                }
+            ))
+
+    @staticmethod
+    def _contribution(values):
+        downloaded = bool(values['downloaded'])
+        return {
+            'total': 1,
+            'discovered': int(values['duration'] is not None),
+            'downloaded': int(downloaded),
+            'discovered_downloaded': int(downloaded and values['duration'] is not None),
+            'failed': int(values['download_status'] == 'failed'),
+            'bytes': (values['file_size'] or 0) if downloaded else 0,
+        }
+
+    @staticmethod
+    def _before_flush(session, flush_context, instances):
+        deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+        def add(values, sign):
+            contribution = LibraryStats._contribution(values)
+            for key in (values['channel_id'], LIBRARY):
+                if key is None:
+                    continue
+                for name in COUNTERS:
+                    deltas[key][name] += sign * contribution[name]
+
+        for obj in session.new:
+            if isinstance(obj, Video):
+                add({column: getattr(obj, column) for column in TRACKED_COLUMNS}, 1)
+
+        changed = [obj for obj in session.dirty if isinstance(obj, Video) and session.is_modified(obj)]
+        deleted = [obj for obj in session.deleted if isinstance(obj, Video)]
+        if changed or deleted:
+            # The rows still hold their pre-flush values, which covers attributes
+            # that were expired before being changed
+            columns = [Video.__table__.c[column] for column in TRACKED_COLUMNS]
+            ids = [obj.id for obj in changed + deleted]
+            old_rows = {
+                row.id: row._mapping
+                for row in session.connection().execute(select(Video.__table__.c.id, *columns).where(Video.__table__.c.id.in_(ids)))
+            }
+            for obj in deleted:
+                if obj.id in old_rows:
+                    add(old_rows[obj.id], -1)
+            for obj in changed:
+                if obj.id in old_rows:
+                    add(old_rows[obj.id], -1)
+                add({column: getattr(obj, column) for column in TRACKED_COLUMNS}, 1)
+
+        if deltas:
+            LibraryStats._apply(session.connection(), deltas)
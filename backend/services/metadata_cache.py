@@ -0,0 +1,144 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from backend.services.ydl_pool import ydl_pool
+from sqlalchemy import func, update
+from backend.models import MetadataCache as CacheEntry
+from backend.services.singleflight import SingleFlight
+
+class MetadataCache:
+    """
+    SQLite-backed cache for yt-dlp metadata extraction (extract_info with download=False).
+
+    Entries are keyed by URL plus yt-dlp options, expire after a per-kind TTL, and
+    the least recently used entries are evicted once the cache grows past max_bytes.
+    Concurrent misses for the same key share a single in-flight extraction.
+    """
+    TTLS = {
+        'search': timedelta(hours=1),
+        'channel': timedelta(hours=6),
+        'channel_videos': timedelta(minutes=30),
+        'preview': timedelta(minutes=30),
+        'playlists': timedelta(hours=6),
+        'playlist': timedelta(hours=1),
+        'video': timedelta(hours=1),
+    }
+    DEFAULT_TTL = timedelta(hours=1)
+
+    def __init__(self, session_factory, max_bytes=64 * 1024 * 1024, write_queue=None):
+        self.session_factory = session_factory
+        self.write_queue = write_queue
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._inflight = SingleFlight()
+
+    def extract(self, url, ydl_opts, kind):
+        """Return extract_info(url) for ydl_opts, from cache when a fresh entry exists"""
+        key = self._key(url, ydl_opts)
+        info = self._get(key)
+        if info is not None:
+            self._count('hits')
+            return info
+
+        self._count('misses')
+        return self._inflight.do(key, lambda: self._fetch(key, kind, url, ydl_opts))
+
+    def invalidate(self, url=None, kind=None):
+        db = self.session_factory()
+        try:
+            query = db.query(CacheEntry)
+            if url:
+                query = query.filter_by(url=url)
+            if kind:
+                query = query.filter_by(kind=kind)
+            removed = query.delete()
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self):
+        db = self.session_factory()
+        try:
+            entries = db.query(CacheEntry).count()
+            size = db.query(func.coalesce(func.sum(CacheEntry.size), 0)).scalar()
+        finally:
+            db.close()
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'coalesced': self._inflight.stats(),
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None
+        })
+        return stats
+
+    def _key(self, url, ydl_opts):
+        raw = json.dumps({'url': url, 'opts': ydl_opts}, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _fetch(self, key, kind, url, ydl_opts):
+        with ydl_pool.checkout(ydl_opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        self._put(key, kind, url, info)
+        return info
+
+    def _get(self, key):
+        db = self.session_factory()
+        try:
+            entry = db.query(CacheEntry).filter_by(key=key).first()
+            if not entry or entry.expires_at <= datetime.utcnow():
+                return None
+            if self.write_queue:
+                self.write_queue.submit(update(CacheEntry).where(CacheEntry.key == key).values(accessed_at=datetime.utcnow()))
+            else:
+                entry.accessed_at = datetime.utcnow()
+                db.commit()
+            return json.loads(entry.data)
+        finally:
+            db.close()
+
+    def _put(self, key, kind, url, info):
+        data = json.dumps(info)
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.merge(CacheEntry(
+                key=key,
+                kind=kind,
+                url=url,
+                data=data,
+                size=len(data),
+                fetched_at=now,
+                expires_at=now + self.TTLS.get(kind, self.DEFAULT_TTL),
+                accessed_at=now
+            ))
+            db.commit()
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        evicted = db.query(CacheEntry).filter(CacheEntry.expires_at <= datetime.utcnow()).delete()
+        total = db.query(func.coalesce(func.sum(CacheEntry.size), 0)).scalar()
+        if total > self.max_bytes:
+            stale = []
+            for key, size in db.query(CacheEntry.key, CacheEntry.size).order_by(CacheEntry.accessed_at):
+                if total <= self.max_bytes:
+                    break
+                stale.append(key)
+                total -= size or 0
+            evicted += db.query(CacheEntry).filter(CacheEntry.key.in_(stale)).delete(synchronize_session=False)
+        db.commit()
+        if evicted:
+            self._count('evictions', evicted)
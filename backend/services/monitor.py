@@ -1,39 +1,91 @@
-import yt_dlp
+import feedparser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
 from datetime import datetime
 from sqlalchemy.orm import Session
-from backend.models import Channel, Video
-from backend.services.downloader import Downloader
+from backend.models import Channel, Video, Playlist, PlaylistVideo
+from backend.services.ingest import VideoIngestor
+from backend.services.episodes import EpisodeAllocator
+from backend.services.http_client import http_client
+from backend.services.ydl_pool import ydl_pool
 
 class Monitor:
+    FEED_URL = 'https://www.youtube.com/feeds/videos.xml?channel_id={}'
+    
     def __init__(self, db: Session):
         self.db = db
-        self.downloader = Downloader()
     
-    def get_channel_videos(self, channel: Channel, limit=None):
+    # Consecutive already-stored videos that end an incremental sync
+    INCREMENTAL_STOP_AFTER = 10
+    
+    def get_channel_videos(self, channel: Channel, limit=None, known_ids=None):
+        """
+        List a channel's uploads, newest first.
+        When known_ids is given the uploads tab is paged lazily and listing stops at
+        the channel's high-water mark or after a run of already-known videos.
+        """
         ydl_opts = {'quiet': True, 'extract_flat': True}
         if limit:
             ydl_opts['playlistend'] = limit
+        incremental = known_ids is not None
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(f'https://www.youtube.com/channel/{channel.channel_id}/videos', download=False)
+        with ydl_pool.checkout(ydl_opts) as ydl:
+            # process=False leaves 'entries' as a generator that fetches pages on demand
+            info = ydl.extract_info(f'https://www.youtube.com/channel/{channel.channel_id}/videos', download=False, process=not incremental)
             
             videos = []
-            if 'entries' in info:
-                for entry in info['entries']:
-                    if entry:
-                        videos.append({
-                            'video_id': entry.get('id'),
-                            'title': entry.get('title'),
-                            'upload_date': entry.get('upload_date'),
-                            'duration': entry.get('duration'),
-                            'view_count': entry.get('view_count')
-                        })
+            known_run = 0
+            for entry in info.get('entries') or []:
+                if not entry:
+                    continue
+                if incremental:
+                    if limit and len(videos) + known_run >= limit:
+                        break
+                    if entry.get('id') == channel.last_video_id:
+                        break
+                    if entry.get('id') in known_ids:
+                        known_run += 1
+                        if known_run >= self.INCREMENTAL_STOP_AFTER:
+                            break
+                        continue
+                    known_run = 0
+                videos.append({
+                    'video_id': entry.get('id'),
+                    'title': entry.get('title'),
+                    'upload_date': entry.get('upload_date'),
+                    'uploaded_at': self.upload_time(entry),
+                    'duration': entry.get('duration'),
+                    'view_count': entry.get('view_count')
+                })
             return videos
     
+    @staticmethod
+    def upload_time(entry):
+        """Upload time (naive UTC) of a yt-dlp entry, or None when it does not carry one"""
+        if entry.get('timestamp'):
+            return datetime.utcfromtimestamp(entry['timestamp'])
+        if entry.get('upload_date'):
+            try:
+                return datetime.strptime(entry['upload_date'], '%Y%m%d')
+            except ValueError:
+                return None
+        return None
+    
+    def get_known_video_ids(self, channel: Channel):
+        return {row[0] for row in self.db.query(Video.video_id).filter_by(channel_id=channel.id)}
+    
+    def sync_channel_videos(self, channel: Channel, full=False):
+        """Fetch uploads newer than the high-water mark, or the whole uploads tab when full=True"""
+        known_ids = None if full else self.get_known_video_ids(channel)
+        videos = self.get_channel_videos(channel, known_ids=known_ids)
+        if videos:
+            channel.last_video_id = videos[0]['video_id']
+        return videos
+    
     def get_channel_playlists(self, channel: Channel):
         ydl_opts = {'quiet': True, 'extract_flat': True}
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with ydl_pool.checkout(ydl_opts) as ydl:
             info = ydl.extract_info(f'https://www.youtube.com/channel/{channel.channel_id}/playlists', download=False)
             
             playlists = []
@@ -50,7 +102,7 @@ class Monitor:
     def get_playlist_videos(self, playlist_url):
         ydl_opts = {'quiet': True, 'extract_flat': True}
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with ydl_pool.checkout(ydl_opts) as ydl:
             info = ydl.extract_info(playlist_url, download=False)
             
             videos = []
@@ -60,62 +112,234 @@ class Monitor:
                         videos.append({
                             'video_id': entry.get('id'),
                             'title': entry.get('title'),
+                            'uploaded_at': self.upload_time(entry),
                             'playlist_id': info.get('id')
                         })
             return videos
     
-    def check_channel(self, channel: Channel):
-        videos_data = self.get_channel_videos(channel)
+    def update_playlist_membership(self, playlist_id, videos):
+        """
+        Store which videos a playlist contains and at which (1-based) position.
+        Only rows that were added, moved or removed are written. A monitored
+        playlist's last_sync records that its membership is stored, even when
+        it has no videos.
+        """
+        current = {row.video_id: row for row in self.db.query(PlaylistVideo).filter_by(playlist_id=playlist_id)}
+        positions = {}
+        for position, vid in enumerate(videos, 1):
+            if vid.get('video_id'):
+                positions.setdefault(vid['video_id'], position)
         
-        new_videos = []
-        for vid_data in videos_data:
-            video_id = vid_data['video_id']
-            existing = self.db.query(Video).filter_by(video_id=video_id).first()
-            
-            if not existing:
-                video = Video(
-                    video_id=video_id,
-                    channel_id=channel.id,
-                    title=vid_data['title'],
-                    publish_date=datetime.now()
-                )
-                self.db.add(video)
-                new_videos.append(video)
+        for video_id, row in current.items():
+            if video_id not in positions:
+                self.db.delete(row)
+            elif row.position != positions[video_id]:
+                row.position = positions[video_id]
+        for video_id, position in positions.items():
+            if video_id not in current:
+                self.db.add(PlaylistVideo(playlist_id=playlist_id, video_id=video_id, position=position))
+        self.db.query(Playlist).filter_by(playlist_id=playlist_id).update({'last_sync': datetime.utcnow()})
+        self.db.commit()
+    
+    def refresh_playlist_membership(self, playlist: Playlist):
+        videos = self.get_playlist_videos(f'https://www.youtube.com/playlist?list={playlist.playlist_id}')
+        self.update_playlist_membership(playlist.playlist_id, videos)
+    
+    def playlists_without_membership(self, channel_id=None):
+        """
+        Monitored playlists whose membership was never read, e.g. ones monitored
+        before it was stored. Empty playlists are read once and then left alone.
+        """
+        query = self.db.query(Playlist).filter(
+            Playlist.monitored == True,
+            Playlist.last_sync.is_(None)
+        )
+        if channel_id is not None:
+            query = query.filter(Playlist.channel_id == channel_id)
+        return query
+    
+    def backfill_playlist_membership(self, channel_id=None, on_progress=None):
+        """Refresh membership for playlists_without_membership(); returns how many were refreshed"""
+        playlists = self.playlists_without_membership(channel_id).all()
+        refreshed = 0
+        for done, playlist in enumerate(playlists, 1):
+            try:
+                self.refresh_playlist_membership(playlist)
+                refreshed += 1
+            except Exception as e:
+                self.db.rollback()
+                print(f"Error refreshing playlist {playlist.playlist_id}: {e}")
+                # Private or deleted playlists would otherwise be fetched again by every
+                # download; the next sync that finds new uploads retries them
+                playlist.last_sync = datetime.utcnow()
+                self.db.commit()
+            if on_progress:
+                on_progress(done, len(playlists))
+        return refreshed
+    
+    def find_playlist_for_video(self, channel_id, video_id):
+        """Return (playlist, position) for the first monitored playlist containing the video"""
+        return self.db.query(Playlist, PlaylistVideo.position).join(
+            PlaylistVideo, PlaylistVideo.playlist_id == Playlist.playlist_id
+        ).filter(
+            Playlist.channel_id == channel_id,
+            Playlist.monitored == True,
+            PlaylistVideo.video_id == video_id
+        ).order_by(Playlist.season_number).first()
+    
+    def poll_feed(self, channel: Channel):
+        """
+        Poll the channel's Atom feed with a conditional GET.
+        Returns (video_ids, published, etag, last_modified); video_ids is empty when
+        the feed is unchanged (304) and None when the feed could not be read, and
+        published maps video IDs to their upload time (naive UTC).
+        """
+        headers = {}
+        if channel.feed_etag:
+            headers['If-None-Match'] = channel.feed_etag
+        if channel.feed_modified:
+            headers['If-Modified-Since'] = channel.feed_modified
         
-        if new_videos:
-            self.db.commit()
+        try:
+            response = http_client.get(self.FEED_URL.format(channel.channel_id), headers=headers)
+        except requests.RequestException as e:
+            print(f"Feed poll failed for {channel.channel_name}: {e}")
+            return None, {}, None, None
+        
+        if response.status_code == 304:
+            return [], {}, channel.feed_etag, channel.feed_modified
+        if response.status_code != 200:
+            return None, {}, None, None
+        
+        feed = feedparser.parse(response.content)
+        video_ids = [entry.get('yt_videoid') for entry in feed.entries if entry.get('yt_videoid')]
+        published = {
+            entry['yt_videoid']: datetime(*entry['published_parsed'][:6])
+            for entry in feed.entries if entry.get('yt_videoid') and entry.get('published_parsed')
+        }
+        return video_ids, published, response.headers.get('ETag'), response.headers.get('Last-Modified')
+    
+    def has_unseen_uploads(self, channel: Channel, video_ids):
+        """
+        True when the feed (newest first) lists an upload that is not stored yet.
+        Shorts and live streams appear in the feed but never in the uploads tab,
+        so only entries above the newest one seen by the previous poll count.
+        """
+        if channel.feed_video_id in video_ids:
+            video_ids = video_ids[:video_ids.index(channel.feed_video_id)]
+        if not video_ids:
+            return False
+        known = {row[0] for row in self.db.query(Video.video_id).filter(Video.video_id.in_(video_ids))}
+        return any(video_id not in known for video_id in video_ids)
+    
+    def record_upload_times(self, published):
+        """Fill in uploaded_at for stored videos from the feed's published times"""
+        for video_id, uploaded_at in published.items():
+            self.db.query(Video).filter(
+                Video.video_id == video_id,
+                Video.uploaded_at.is_(None)
+            ).update({'uploaded_at': uploaded_at}, synchronize_session=False)
+    
+    def _store_feed_state(self, channel: Channel, feed_ids, etag, modified):
+        channel.feed_etag, channel.feed_modified = etag, modified
+        if feed_ids:
+            channel.feed_video_id = feed_ids[0]
+    
+    def check_channel(self, channel: Channel, full=False):
+        # Cheap tier: only enumerate through yt-dlp when the feed shows unseen uploads.
+        # Channels that have never been synced always take the full path.
+        feed_ids, published, etag, modified = None, {}, None, None
+        if not full and channel.last_video_id:
+            feed_ids, published, etag, modified = self.poll_feed(channel)
+        if feed_ids is not None and not self.has_unseen_uploads(channel, feed_ids):
+            self.record_upload_times(published)
+            self._store_feed_state(channel, feed_ids, etag, modified)
             channel.last_sync = datetime.utcnow()
             self.db.commit()
+            return []
+        
+        videos_data = self.sync_channel_videos(channel, full=full)
+        
+        ingestor = VideoIngestor(self.db)
+        new_ids = ingestor.upsert([{
+            'video_id': vid_data['video_id'],
+            'channel_id': channel.id,
+            'title': vid_data['title'],
+            'publish_date': datetime.now(),
+            'uploaded_at': vid_data.get('uploaded_at')
+        } for vid_data in videos_data], fill=['uploaded_at'])
+        self.record_upload_times(published)
+        # Kept in enumeration order, newest first
+        new_videos = ingestor.load(vid_data['video_id'] for vid_data in videos_data if vid_data['video_id'] in new_ids)
+        
+        # Validators are only stored once the sync succeeded, so a failed
+        # enumeration is retried instead of hidden behind a 304
+        if feed_ids is not None:
+            self._store_feed_state(channel, feed_ids, etag, modified)
+        channel.last_sync = datetime.utcnow()
+        self.db.commit()
         
         return new_videos
     
-    def check_all_channels(self):
-        channels = self.db.query(Channel).filter_by(monitored=True).all()
+    def check_all_channels(self, session_factory, on_new_videos=None, max_workers=4, on_progress=None):
+        """
+        Sync every monitored channel, up to max_workers at a time, each in its own session.
+        A failing channel is logged and skipped. New videos are handed to
+        on_new_videos(db, channel, videos) instead of being downloaded inline, and
+        on_progress(done, total) is called as channels finish.
+        Returns the YouTube IDs of all new videos.
+        """
+        channel_ids = [row[0] for row in self.db.query(Channel.id).filter_by(monitored=True)]
         all_new = []
         
-        for channel in channels:
-            new_videos = self.check_channel(channel)
-            for video in new_videos:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='channel-sync') as pool:
+            futures = {
+                pool.submit(self.sync_channel_job, session_factory, channel_id, on_new_videos): channel_id
+                for channel_id in channel_ids
+            }
+            for done, future in enumerate(as_completed(futures), 1):
                 try:
-                    # Assign episode number
-                    if not video.episode_number:
-                        video.episode_number = self.db.query(Video).filter_by(channel_id=channel.id).count()
-                        self.db.commit()
-                    
-                    path = self.downloader.download_video(
-                        video.video_id,
-                        channel.channel_name,
-                        channel.download_path,
-                        channel.quality,
-                        video.season_number,
-                        video.episode_number,
-                        'standard'
-                    )
-                    video.downloaded = True
-                    video.download_path = path
-                    self.db.commit()
-                    all_new.append(video)
+                    all_new.extend(future.result())
                 except Exception as e:
-                    print(f"Error downloading {video.title}: {e}")
+                    print(f"Error syncing channel {futures[future]}: {e}")
+                if on_progress:
+                    on_progress(done, len(futures))
         
         return all_new
+    
+    def sync_channel_job(self, session_factory, channel_id, on_new_videos=None):
+        """Sync one channel in its own session; used by check_all_channels and the scheduler"""
+        db = session_factory()
+        try:
+            channel = db.query(Channel).filter_by(id=channel_id).first()
+            if not channel:
+                return []
+            
+            monitor = Monitor(db)
+            new_videos = monitor.check_channel(channel)
+            
+            # New uploads may have been added to monitored playlists
+            if new_videos:
+                for playlist in db.query(Playlist).filter_by(channel_id=channel.id, monitored=True):
+                    try:
+                        monitor.refresh_playlist_membership(playlist)
+                    except Exception as e:
+                        print(f"Error refreshing playlist {playlist.playlist_id}: {e}")
+            # Number new uploads with one block reservation per season. new_videos is in
+            # enumeration order (newest first); publish_date is only when the sync ran, so
+            # walk it backwards to give the oldest upload the lowest number
+            unnumbered = {}
+            for video in reversed(new_videos):
+                if not video.episode_number:
+                    unnumbered.setdefault(video.season_number, []).append(video)
+            for season_number, videos in unnumbered.items():
+                numbers = EpisodeAllocator.reserve(db, channel.id, season_number, len(videos))
+                for video, number in zip(videos, numbers):
+                    video.episode_number = number
+            db.commit()
+            
+            if new_videos and on_new_videos:
+                on_new_videos(db, channel, new_videos)
+            return [video.video_id for video in new_videos]
+        finally:
+            db.close()
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    pass
+
+class Keyset:
+    """
+    Keyset (seek) pagination on (sort column, id).
+
+    Each page continues from the last row of the previous one instead of an
+    OFFSET, so deep pages cost the same as the first. The continuation token is
+    opaque to clients: base64 JSON of the scope it was issued for (sort, filter)
+    plus the last row's sort key and id.
+
+    SQLite sorts NULLs first ascending and last descending; the seek condition
+    follows the same rule so rows without a sort key are not skipped.
+    """
+    def __init__(self, column, id_column, descending=False):
+        self.column = column
+        self.id_column = id_column
+        self.descending = descending
+
+    def order_by(self):
+        if self.descending:
+            return [self.column.desc(), self.id_column.desc()]
+        return [self.column.asc(), self.id_column.asc()]
+
+    def after(self, key, last_id):
+        """Filter matching the rows that come after (key, last_id) in this order"""
+        column, id_column = self.column, self.id_column
+        if self.descending:
+            if key is None:
+                return and_(column.is_(None), id_column < last_id)
+            return or_(column < key, and_(column == key, id_column < last_id), column.is_(None))
+        if key is None:
+            return or_(and_(column.is_(None), id_column > last_id), column.isnot(None))
+        return or_(column > key, and_(column == key, id_column > last_id))
+
+    @staticmethod
+    def encode(scope, key, last_id):
+        if isinstance(key, datetime):
+            key = {'dt': key.isoformat()}
+        raw = json.dumps({'s': scope, 'k': key, 'id': last_id}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode(token, scope):
+        """Return (key, last_id) from a token issued for scope"""
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            data = json.loads(raw)
+            key = data['k']
+            if isinstance(key, dict):
+                key = datetime.fromisoformat(key['dt'])
+            last_id = int(data['id'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursor(f"Malformed cursor: {e}")
+        if data.get('s') != scope:
+            raise InvalidCursor("Cursor was issued for a different sort or filter")
+        return key, last_id
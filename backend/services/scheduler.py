@@ -0,0 +1,208 @@
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from apscheduler.triggers.interval import IntervalTrigger
+from backend.models import Channel, Video
+
+class SyncRescanGate:
+    """
+    Lets any number of channel syncs run together while keeping rescans exclusive.
+    A waiting rescan blocks new syncs from starting so it cannot be starved.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._syncs = 0
+        self._rescanning = False
+        self._rescan_waiting = 0
+
+    @contextmanager
+    def sync(self):
+        with self._cond:
+            while self._rescanning or self._rescan_waiting:
+                self._cond.wait()
+            self._syncs += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._syncs -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def rescan(self):
+        with self._cond:
+            self._rescan_waiting += 1
+            while self._rescanning or self._syncs:
+                self._cond.wait()
+            self._rescan_waiting -= 1
+            self._rescanning = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._rescanning = False
+                self._cond.notify_all()
+
+class SyncScheduler:
+    """
+    Gives every monitored channel its own sync job on the shared APScheduler instance.
+
+    The poll interval follows the channel's observed upload cadence (hourly for
+    daily uploaders down to weekly for dormant channels). The first run is due
+    one interval after the channel's last sync, so restarts do not push syncs
+    back; never-synced channels are spread over the interval, and each run is
+    jittered. Missed runs are coalesced into one and a channel never has two
+    syncs in flight.
+    """
+    # (median gap between uploads, poll interval)
+    CADENCE_TIERS = [
+        (timedelta(days=1), timedelta(hours=1)),
+        (timedelta(days=7), timedelta(hours=6)),
+        (timedelta(days=30), timedelta(days=1)),
+    ]
+    DORMANT_INTERVAL = timedelta(days=7)
+    DEFAULT_INTERVAL = timedelta(hours=6)
+    CADENCE_SAMPLE = 20
+
+    def __init__(self, scheduler, session_factory, sync_channel, rescan=None):
+        self.scheduler = scheduler
+        self.session_factory = session_factory
+        self.sync_channel = sync_channel
+        self.rescan = rescan
+        self.gate = SyncRescanGate()
+        self.min_interval = timedelta(minutes=15)
+        self.enabled = False
+        self._configured = None
+
+    def configure(self, settings):
+        """
+        Apply autoSync / syncInterval / rescanInterval settings, (re)building all jobs.
+        Saving other settings leaves the existing jobs and their next run times alone.
+        """
+        configured = (bool(settings.get('autoSync')), int(settings.get('syncInterval') or 15), int(settings.get('rescanInterval') or 0))
+        if configured == self._configured:
+            return
+        self._configured = configured
+        self.enabled = configured[0]
+        self.min_interval = timedelta(minutes=max(1, configured[1]))
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('sync-') or job.id == 'rescan':
+                job.remove()
+        if not self.enabled:
+            return
+
+        db = self.session_factory()
+        try:
+            for channel in db.query(Channel).filter_by(monitored=True):
+                self._add_channel_job(db, channel)
+        finally:
+            db.close()
+
+        rescan_minutes = configured[2]
+        if self.rescan and rescan_minutes > 0:
+            self.scheduler.add_job(
+                self._run_rescan,
+                IntervalTrigger(minutes=rescan_minutes, jitter=30),
+                id='rescan',
+                coalesce=True,
+                max_instances=1,
+                replace_existing=True
+            )
+
+    def schedule_channel(self, channel_id):
+        if not self.enabled:
+            return
+        db = self.session_factory()
+        try:
+            channel = db.query(Channel).filter_by(id=channel_id).first()
+            if channel and channel.monitored:
+                self._add_channel_job(db, channel)
+            else:
+                self.unschedule_channel(channel_id)
+        finally:
+            db.close()
+
+    def unschedule_channel(self, channel_id):
+        job = self.scheduler.get_job(f'sync-{channel_id}')
+        if job:
+            job.remove()
+
+    def interval_for(self, db, channel):
+        """
+        Pick a poll interval from the median gap between the channel's recent uploads.
+        Uses the upload times from YouTube (uploaded_at), not publish_date, which
+        records when this app found the video.
+        """
+        dates = [row[0] for row in db.query(Video.uploaded_at).filter(
+            Video.channel_id == channel.id,
+            Video.uploaded_at.isnot(None)
+        ).order_by(Video.uploaded_at.desc()).limit(self.CADENCE_SAMPLE)]
+        # Day-precision upload dates make same-day uploads look simultaneous
+        gaps = sorted(gap for gap in (a - b for a, b in zip(dates, dates[1:])) if gap > timedelta(minutes=1))
+        if not gaps:
+            interval = self.DEFAULT_INTERVAL
+        elif datetime.utcnow() - dates[0] > self.CADENCE_TIERS[-1][0]:
+            interval = self.DORMANT_INTERVAL
+        else:
+            median = gaps[len(gaps) // 2]
+            interval = next((poll for limit, poll in self.CADENCE_TIERS if median <= limit), self.DORMANT_INTERVAL)
+        return max(interval, self.min_interval)
+
+    def _add_channel_job(self, db, channel):
+        interval = self.interval_for(db, channel)
+        seconds = int(interval.total_seconds())
+        self.scheduler.add_job(
+            self._run_sync,
+            IntervalTrigger(
+                seconds=seconds,
+                start_date=self._first_run(channel, interval),
+                jitter=max(1, seconds // 10)
+            ),
+            args=[channel.id],
+            id=f'sync-{channel.id}',
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=max(1, seconds // 2),
+            replace_existing=True
+        )
+
+    def _first_run(self, channel, interval):
+        """One interval after the last sync (last_sync is UTC), jittered and never in the past"""
+        seconds = int(interval.total_seconds())
+        if not channel.last_sync:
+            return datetime.now() + timedelta(seconds=random.randint(0, seconds))
+        remaining = max(timedelta(0), channel.last_sync + interval - datetime.utcnow())
+        return datetime.now() + remaining + timedelta(seconds=random.randint(0, max(1, seconds // 10)))
+
+    def _run_sync(self, channel_id):
+        try:
+            with self.gate.sync():
+                self.sync_channel(channel_id)
+        except Exception as e:
+            print(f"Scheduled sync failed for channel {channel_id}: {e}")
+        self._reschedule(channel_id)
+
+    def _reschedule(self, channel_id):
+        """Move the channel to a new interval if its cadence changed"""
+        job = self.scheduler.get_job(f'sync-{channel_id}')
+        if not job:
+            return
+        db = self.session_factory()
+        try:
+            channel = db.query(Channel).filter_by(id=channel_id).first()
+            if not channel:
+                return
+            interval = self.interval_for(db, channel)
+            if job.trigger.interval != interval:
+                seconds = int(interval.total_seconds())
+                job.reschedule(IntervalTrigger(seconds=seconds, jitter=max(1, seconds // 10)))
+        finally:
+            db.close()
+
+    def _run_rescan(self):
+        try:
+            with self.gate.rescan():
+                self.rescan()
+        except Exception as e:
+            print(f"Scheduled rescan failed: {e}")
@@ -29,4 +29,7 @@ class WebSocketManager:
     async def send_status_update(self, status_data):
         await self.broadcast({"type": "status_update", "status": status_data})
 
+    async def send_job_update(self, job_data):
+        await self.broadcast({"type": "job_update", "job": job_data})
+
 ws_manager = WebSocketManager()
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import yt_dlp
+
+class YoutubeDLPool:
+    """
+    Reusable YoutubeDL instances, pooled per option profile.
+
+    Building a YoutubeDL loads every extractor class, sets up the cookie jar,
+    HTTP handlers and postprocessors, so instances are kept and handed out
+    again. The profile is the option dict minus the per-call options in
+    OVERRIDES (flat listing, full metadata, download at a given quality, ...);
+    per-call options are applied on checkout and undone on return. An instance
+    is only ever used by one thread at a time, and one that raised is dropped
+    rather than returned.
+    """
+    OVERRIDES = ('playlistend', 'outtmpl', 'progress_hooks')
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._stats = {'checkouts': 0, 'created': 0, 'reused': 0, 'discarded': 0, 'setup_seconds': 0.0}
+
+    @contextmanager
+    def checkout(self, ydl_opts):
+        """with pool.checkout(opts) as ydl: behaves like with yt_dlp.YoutubeDL(opts) as ydl:"""
+        base, profile = self._profile(ydl_opts)
+        overrides = {key: ydl_opts[key] for key in self.OVERRIDES if key in ydl_opts}
+
+        ydl = self._take(profile, base)
+        saved = self._apply(ydl, overrides)
+        try:
+            yield ydl
+        except BaseException:
+            self._count('discarded')
+            self._close(ydl)
+            raise
+        self._restore(ydl, saved)
+        self._give(profile, ydl)
+
+    def warm(self, profiles):
+        """Build one idle instance for each option dict in profiles that has none yet"""
+        for ydl_opts in profiles:
+            base, profile = self._profile(ydl_opts)
+            with self._lock:
+                if self._idle.get(profile):
+                    continue
+            self._give(profile, self._create(base))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(instances) for instances in self._idle.values())
+            stats['profiles'] = len(self._idle)
+        stats['setup_seconds'] = round(stats['setup_seconds'], 3)
+        stats['avg_setup_ms'] = round(stats['setup_seconds'] * 1000 / stats['created'], 1) if stats['created'] else None
+        return stats
+
+    def _profile(self, ydl_opts):
+        base = {key: value for key, value in ydl_opts.items() if key not in self.OVERRIDES}
+        return base, json.dumps(base, sort_keys=True, default=repr)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _take(self, profile, base):
+        with self._lock:
+            self._stats['checkouts'] += 1
+            instances = self._idle.get(profile)
+            if instances:
+                self._stats['reused'] += 1
+                return instances.pop()
+        return self._create(base)
+
+    def _create(self, base):
+        started = time.perf_counter()
+        ydl = yt_dlp.YoutubeDL(dict(base))
+        with self._lock:
+            self._stats['created'] += 1
+            self._stats['setup_seconds'] += time.perf_counter() - started
+        return ydl
+
+    def _give(self, profile, ydl):
+        with self._lock:
+            instances = self._idle.setdefault(profile, [])
+            if len(instances) < self.max_idle:
+                instances.append(ydl)
+                return
+        self._close(ydl)
+
+    def _apply(self, ydl, overrides):
+        saved = {
+            'params': {key: ydl.params.get(key) for key in ('playlistend', 'outtmpl')},
+            'progress_hooks': list(ydl._progress_hooks)
+        }
+        if 'playlistend' in overrides:
+            ydl.params['playlistend'] = overrides['playlistend']
+        if 'outtmpl' in overrides:
+            outtmpl = overrides['outtmpl']
+            ydl.params['outtmpl'] = dict(outtmpl) if isinstance(outtmpl, dict) else {'default': outtmpl}
+            ydl._parse_outtmpl()
+        if 'progress_hooks' in overrides:
+            ydl._progress_hooks = list(overrides['progress_hooks'])
+        return saved
+
+    def _restore(self, ydl, saved):
+        for key, value in saved['params'].items():
+            if value is None:
+                ydl.params.pop(key, None)
+            else:
+                ydl.params[key] = value
+        ydl._progress_hooks = saved['progress_hooks']
+
+    def _close(self, ydl):
+        try:
+            ydl.close()
+        except Exception as e:
+            print(f"Failed to close YoutubeDL instance: {e}")
+
+ydl_pool = YoutubeDLPool(max_idle=int(os.getenv('TUBARR_YTDLP_POOL', 4)))
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
+import { resolveJob } from './utils/jobs';
 import { ChannelList } from './components/views/ChannelList';
 import { ChannelDetailView } from './components/views/ChannelDetailView';
 import { PlaylistDetail } from './components/views/PlaylistDetail';
@@ -163,7 +164,7 @@ function App() {
 
   const addChannel = async (e) => {
     e.preventDefault();
-    await axios.post('/api/v1/channel', newChannel);
+    await resolveJob(await axios.post('/api/v1/channel', newChannel));
     setNewChannel({ channel_url: '', download_path: settings.defaultPath || '/downloads', quality: '1080p' });
     loadChannels();
   };
@@ -179,8 +180,8 @@ function App() {
       const res = await axios.get(`/api/v1/channel/${channel.id}?limit=25&offset=0&sort=date_desc&filter=all`);
       setChannelDetail(res.data);
       setLoading(false);
-      axios.get(`/api/v1/channel/${channel.id}/playlists`).then(playlistRes => {
-        setPlaylists(playlistRes.data);
+      axios.get(`/api/v1/channel/${channel.id}/playlists`).then(resolveJob).then(playlistData => {
+        setPlaylists(playlistData);
         setPlaylistsLoading(false);
       }).catch(() => setPlaylistsLoading(false));
     } catch (error) {
@@ -192,14 +193,17 @@ function App() {
   const loadMoreVideos = async () => {
     if (!channelDetail || !channelDetail.has_more) return;
     const currentLength = channelDetail.videos.length;
-    const res = await axios.get(`/api/v1/channel/${channelDetail.channel.id}?limit=25&offset=${currentLength}&sort=${sortBy}&filter=${filterBy}`);
+    const res = await axios.get(`/api/v1/channel/${channelDetail.channel.id}`, {
+      params: { limit: 25, cursor: channelDetail.next_cursor, sort: sortBy, filter: filterBy }
+    });
     const newCount = currentLength + res.data.videos.length;
     loadedVideosRef.current = newCount;
     setChannelDetail(prev => ({
       ...prev,
       videos: [...prev.videos, ...res.data.videos],
       loaded_videos: newCount,
-      has_more: res.data.has_more
+      has_more: res.data.has_more,
+      next_cursor: res.data.next_cursor
     }));
   };
 
@@ -306,17 +310,17 @@ function App() {
   const confirmAddChannel = async () => {
     try {
       setAddingChannel(channelModal.channel_id);
-      const response = await axios.post('/api/v1/channel', {
+      const addedChannel = await resolveJob(await axios.post('/api/v1/channel', {
         channel_url: channelModal.channel_url,
         download_path: channelModal.download_path,
         quality: channelModal.quality,
         monitored: channelModal.monitored
-      });
+      }));
       await loadChannels();
       setChannelModal(null);
       setAddingChannel(null);
       if (channelModal.monitored) {
-        viewChannelDetail(response.data);
+        viewChannelDetail(addedChannel);
       }
     } catch (error) {
       console.error('Error adding channel:', error);
@@ -331,7 +335,7 @@ function App() {
         await axios.post(`/api/v1/playlist/${playlistModal.playlist_id}/unmonitor`);
         alert('Playlist unmonitored');
       } else {
-        await axios.post(`/api/v1/playlist/${playlistModal.playlist_id}/monitor?channel_id=${channelDetail.channel.id}&download_all=${playlistModal.downloadAll}`);
+        await resolveJob(await axios.post(`/api/v1/playlist/${playlistModal.playlist_id}/monitor?channel_id=${channelDetail.channel.id}&download_all=${playlistModal.downloadAll}`));
         if (playlistModal.downloadAll) {
           alert(`Monitoring playlist and downloading all ${playlistModal.video_count} videos in background!`);
         } else {
@@ -339,8 +343,7 @@ function App() {
         }
       }
       setPlaylistModal(null);
-      const playlistRes = await axios.get(`/api/v1/channel/${channelDetail.channel.id}/playlists`);
-      setPlaylists(playlistRes.data);
+      setPlaylists(await resolveJob(await axios.get(`/api/v1/channel/${channelDetail.channel.id}/playlists`)));
     } catch (error) {
       alert('Failed: ' + error.message);
     }
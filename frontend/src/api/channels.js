@@ -1,4 +1,5 @@
 import api from './client';
+import { resolveJob } from '../utils/jobs';
 
 export const channelsApi = {
   getAll: async () => {
@@ -13,7 +14,7 @@ export const channelsApi = {
   
   add: async (channelUrl) => {
     const res = await api.post('/channel', { url: channelUrl });
-    return res.data;
+    return resolveJob(res);
   },
   
   delete: async (id) => {
@@ -33,12 +34,12 @@ export const channelsApi = {
   
   getPlaylists: async (id) => {
     const res = await api.get(`/channel/${id}/playlists`);
-    return res.data;
+    return resolveJob(res);
   },
   
   search: async (query) => {
     const res = await api.get('/search', { params: { query } });
-    return res.data;
+    return resolveJob(res);
   },
   
   getInfo: async (channelId) => {
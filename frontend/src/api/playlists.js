@@ -1,4 +1,5 @@
 import api from './client';
+import { resolveJob } from '../utils/jobs';
 
 export const playlistsApi = {
   getVideos: async (playlistId) => {
@@ -10,7 +11,7 @@ export const playlistsApi = {
     const res = await api.post(`/playlist/${playlistId}/monitor`, null, {
       params: { channel_id: channelId, download_all: downloadAll }
     });
-    return res.data;
+    return resolveJob(res);
   },
   
   unmonitor: async (playlistId) => {
@@ -1,4 +1,5 @@
 import api from './client';
+import { resolveJob } from '../utils/jobs';
 
 export const systemApi = {
   getSettings: async () => {
@@ -23,7 +24,7 @@ export const systemApi = {
   
   sync: async () => {
     const res = await api.post('/command/sync');
-    return res.data;
+    return resolveJob(res);
   },
   
   proxyImage: (url) => `/api/v1/proxy/image?url=${encodeURIComponent(url)}`
@@ -2,7 +2,6 @@ import React, { useState, useEffect, useRef, useMemo } from 'react';
 import { channelsApi } from '../../api/channels';
 import { videosApi } from '../../api/videos';
 import { playlistsApi } from '../../api/playlists';
-import { systemApi } from '../../api/system';
 import { useApp } from '../../context/AppContext';
 import { formatDuration } from '../../utils/formatters';
 
@@ -67,7 +66,7 @@ export const ChannelDetail = ({ channel, onBack }) => {
     const currentLength = channelDetail.videos.length;
     const res = await channelsApi.getDetail(channel.id, {
       limit: 25,
-      offset: currentLength,
+      cursor: channelDetail.next_cursor,
       sort: sortBy,
       filter: filterBy
     });
@@ -76,7 +75,8 @@ export const ChannelDetail = ({ channel, onBack }) => {
       ...prev,
       videos: [...prev.videos, ...res.data.videos],
       loaded_videos: loadedVideosRef.current,
-      has_more: res.data.has_more
+      has_more: res.data.has_more,
+      next_cursor: res.data.next_cursor
     }));
   };
 
@@ -179,7 +179,7 @@ export const ChannelDetail = ({ channel, onBack }) => {
       <div className="channel-header">
         {channelDetail.channel.thumbnail && (
           <img 
-            src={systemApi.proxyImage(channelDetail.channel.thumbnail)} 
+            src={`/api/v1/channel/${channelDetail.channel.id}/artwork`} 
             alt={channelDetail.channel.channel_name} 
           />
         )}
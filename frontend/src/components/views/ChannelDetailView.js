@@ -36,7 +36,7 @@ export function ChannelDetailView({
         <>
           <div className="channel-header">
             {channelDetail.channel.thumbnail && (
-              <img src={`/api/v1/proxy/image?url=${encodeURIComponent(channelDetail.channel.thumbnail)}`} alt={channelDetail.channel.channel_name} />
+              <img src={`/api/v1/channel/${channelDetail.channel.id}/artwork`} alt={channelDetail.channel.channel_name} />
             )}
             <div className="channel-info">
               <h2>{channelDetail.channel.channel_name}</h2>
@@ -35,7 +35,7 @@ export function ChannelList({ channels, queue, status, onChannelClick }) {
               style={{'--status-color': statusColor}}
             >
               {channel.thumbnail ? (
-                <img src={`/api/v1/proxy/image?url=${encodeURIComponent(channel.thumbnail)}`} alt={channel.channel_name} style={{aspectRatio: '1', borderRadius: '50%'}} />
+                <img src={`/api/v1/channel/${channel.id}/artwork?width=320`} alt={channel.channel_name} style={{aspectRatio: '1', borderRadius: '50%'}} />
               ) : (
                 <div style={{width: '100%', aspectRatio: '1', borderRadius: '50%', background: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)', display: 'flex', alignItems: 'center', justifyContent: 'center', fontSize: '32px', fontWeight: 'bold', color: 'white'}}>
                   {channel.channel_name.charAt(0)}
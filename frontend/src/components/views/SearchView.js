@@ -1,5 +1,6 @@
 import React from 'react';
 import axios from 'axios';
+import { resolveJob } from '../../utils/jobs';
 
 export function SearchView({ 
   searchQuery, 
@@ -14,11 +15,11 @@ export function SearchView({
 }) {
   const searchChannels = async (e) => {
     e.preventDefault();
-    const res = await axios.get(`/api/v1/search?query=${searchQuery}`);
-    setSearchResults(res.data);
+    const results = await resolveJob(await axios.get(`/api/v1/search?query=${searchQuery}`));
+    setSearchResults(results);
     
     // Fetch full channel info in background
-    res.data.forEach(async (result, idx) => {
+    results.forEach(async (result, idx) => {
       try {
         const infoRes = await axios.get(`/api/v1/channel/info/${result.channel_id}`);
         if (infoRes.data) {
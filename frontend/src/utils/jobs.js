@@ -0,0 +1,12 @@
+import axios from 'axios';
+
+// Slow endpoints answer 202 with a job id; poll the job until it finishes and return its result
+export const resolveJob = async (res, interval = 1000) => {
+  if (res.status !== 202 || !res.data.job_id) return res.data;
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, interval));
+    const { data: job } = await axios.get(`/api/v1/jobs/${res.data.job_id}`);
+    if (job.status === 'completed') return job.result;
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+  }
+};